@@ -3,7 +3,30 @@
 import requests
 import yaml
 import argparse
-from awx-porting import get_asset, list_asset, keys_to_keep
+import asyncio
+import importlib
+import json
+import logging
+import os
+import re
+import sys
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+from urllib.parse import quote
+import threading
+
+awx_porting = importlib.import_module('awx-porting')
+get_asset, iter_asset, keys_to_keep = awx_porting.get_asset, awx_porting.iter_asset, awx_porting.keys_to_keep
+ordered_map, join_query = awx_porting.ordered_map, awx_porting.join_query
+
+log = logging.getLogger('asset2yaml')
+
+# libyaml is several times faster in both directions; fall back to the pure
+# Python classes when PyYAML was built without it.
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
 
 src_tower = { 'url': 'old-tower.example.com', 'usr': 'username', 'pwd': 'password', 'verifyssl': True }
 standard_headers = { "Content-Type": "application/json" }
@@ -28,7 +51,84 @@ unified_job_type_mapping = {
 
 global_organization = "MyOrg"
 
-def filter_asset(type: str, asset: dict) -> dict:
+export_options = {
+    "bulk_group_hosts": False,
+    "workers": 1,
+    "dump_batch_size": 200,
+}
+
+group_hosts_index = {}
+group_hosts_locks = {}
+group_hosts_lock = threading.Lock()
+
+def get_inventory_group_hosts(inventory_id: int) -> dict:
+
+    # One lock per inventory: groups of the same inventory wait for a single
+    # script fetch, while other inventories are indexed concurrently.
+    with group_hosts_lock:
+        inventory_lock = group_hosts_locks.setdefault(inventory_id, threading.Lock())
+    with inventory_lock:
+        if inventory_id not in group_hosts_index:
+            group_hosts_index[inventory_id] = build_group_hosts_index(inventory_id)
+
+    return group_hosts_index[inventory_id]
+
+def build_group_hosts_index(inventory_id: int) -> dict:
+
+    # The inventory script lists every group with its direct hosts and
+    # children in one response, which is enough to rebuild all_hosts.
+    url = f"{src_tower['url']}{baseurls['inventory']}{inventory_id}/script/?hostvars=0&all=1"
+    log.info("Indexing group hosts of inventory %s from %s", inventory_id, url)
+    response = awx_porting.tower_request(src_tower, 'GET', url)
+    response.raise_for_status()
+    script = response.json()
+
+    all_hosts = {}
+    def resolve_all_hosts(group_name: str, parents: set) -> set:
+        if group_name not in all_hosts:
+            group = script.get(group_name, {})
+            hosts = set(group.get('hosts', []))
+            for child in group.get('children', []):
+                if child not in parents:
+                    hosts |= resolve_all_hosts(child, parents | {child})
+            all_hosts[group_name] = hosts
+        return all_hosts[group_name]
+
+    return {
+        group_name: sorted(resolve_all_hosts(group_name, {group_name}))
+        for group_name in script
+        if group_name not in ['all', '_meta']
+    }
+
+def get_group_hosts(asset: dict, related: dict) -> list:
+
+    if export_options['bulk_group_hosts']:
+        return get_inventory_group_hosts(asset['inventory']).get(asset['name'], [])
+    return [ host['name'] for host in related['all_hosts']['results'] ]
+
+def related_urls(type: str, asset: dict) -> dict:
+
+    # Related resources filter_asset needs, as name -> (relative url, modified
+    # validator), so either engine can fetch them before filtering.
+    urls = {}
+    if type in ['job_template', 'workflow_job_templates'] and asset['survey_enabled']:
+        urls['survey_spec'] = (asset['related']['survey_spec'], asset['modified'])
+    if type == "workflow_job_templates":
+        urls['workflow_nodes'] = (asset['related']['workflow_nodes'], None)
+    if type == "groups" and not export_options['bulk_group_hosts']:
+        urls['all_hosts'] = (asset['related']['all_hosts'], None)
+    return urls
+
+def fetch_related(type: str, asset: dict) -> dict:
+    return {
+        name: get_asset(src_tower, url, modified=modified)
+        for name, (url, modified) in related_urls(type, asset).items()
+    }
+
+def filter_asset(type: str, asset: dict, node_identifiers: dict = None, related: dict = None) -> dict:
+
+    if related is None:
+        related = fetch_related(type, asset)
 
     new_asset = {
         key: value
@@ -40,20 +140,26 @@ def filter_asset(type: str, asset: dict) -> dict:
         new_asset.update({
             "organization": global_organization,
             "credentials": [ credential['name'] for credential in asset['summary_fields']['credentials'] ],
-            'extra_vars': yaml.safe_load(asset['extra_vars']) if asset['extra_vars'] else None,
+            'extra_vars': load_variables(asset['extra_vars']),
             'inventory': asset['summary_fields']['inventory']['name'] if asset['inventory'] else None,
             'project': asset['summary_fields']['project']['name'] if asset['project'] else None,
-            'survey_spec': get_asset(src_tower, asset['related']['survey_spec']) if asset['survey_enabled'] else {},
+            'survey_spec': related.get('survey_spec', {}),
         })
     if type == "workflow_job_templates":
         new_asset.update({
             "organization": global_organization,
-            'extra_vars': yaml.safe_load(asset['extra_vars']) if asset['extra_vars'] else None,
+            'extra_vars': load_variables(asset['extra_vars']),
             'inventory': asset['summary_fields']['inventory']['name'] if asset['inventory'] else None,
-            'survey_spec': get_asset(src_tower, asset['related']['survey_spec']) if asset['survey_enabled'] else {},
+            'survey_spec': related.get('survey_spec', {}),
+        })
+        # Every node of the workflow is in this one list, so edges can be
+        # resolved from the node ID arrays without fetching them again.
+        nodes = related['workflow_nodes']['results']
+        node_identifiers = { node['id']: node['identifier'] for node in nodes }
+        new_asset.update({
             'workflow_nodes': [
-                filter_asset('workflow_job_template_node', node)
-                for node in get_asset(src_tower, asset['related']['workflow_nodes'])['results']
+                filter_asset('workflow_job_template_node', node, node_identifiers)
+                for node in nodes
             ]
         })
         if asset['webhook_service'] in ['github', 'gitlab']:
@@ -75,9 +181,12 @@ def filter_asset(type: str, asset: dict) -> dict:
 
         for node_type in ['always_nodes', 'success_nodes', 'failure_nodes']:
             if asset[node_type]:
-                nodes_list = get_asset(src_tower, asset['related'][node_type])['results']
+                if node_identifiers is not None:
+                    identifiers = [ node_identifiers[node_id] for node_id in asset[node_type] ]
+                else:
+                    identifiers = [ node['identifier'] for node in get_asset(src_tower, asset['related'][node_type])['results'] ]
                 new_asset['related'].update({
-                    node_type: [ { 'identifier': node['identifier'] }  for node in nodes_list ]
+                    node_type: [ { 'identifier': identifier } for identifier in identifiers ]
                 })
 
         if asset['inventory']:
@@ -96,27 +205,347 @@ def filter_asset(type: str, asset: dict) -> dict:
     if type == "hosts":
         new_asset.update({
             'inventory': asset['summary_fields']['inventory']['name'],
-            'variables': yaml.safe_load(asset['variables']) if asset['variables'] else None
+            'variables': load_variables(asset['variables'])
         })
     if type == "groups":
         new_asset.update({
             "organization": global_organization,
             'inventory': asset['summary_fields']['inventory']['name'],
-            'hosts': [ host['name'] for host in get_asset(src_tower, asset['related']['all_hosts'])['results']],
-            'variables': yaml.safe_load(asset['variables']) if asset['variables'] else None
+            'hosts': get_group_hosts(asset, related),
+            'variables': load_variables(asset['variables'])
         })
 
     return new_asset
 
 
-def retrieve_assets(type: str, limit: int = -1, query: str = None, start_from: int = 0, exclude: str = None, dry_run: bool = False) -> []:
+def retrieve_assets(type: str, limit: int = -1, query: str = None, start_from: int = 0, exclude: str = None, dry_run: bool = False):
+
+    return ordered_map(
+        lambda asset: filter_asset(type, asset),
+        iter_asset(tower=src_tower, type=type, start_from=start_from, query=query, limit=limit),
+        export_options['workers']
+    )
+
+def reject_json_number(text: str):
+    raise ValueError(f"{text} is not read the same way by YAML")
+
+def retrieve_assets_by_inventory(type: str, limit: int = -1, query: str = None, start_from: int = 0):
+
+    # Same as retrieve_assets, paired with the source inventory id that the
+    # filtered asset only keeps as a name.
+    return ordered_map(
+        lambda asset: (asset['inventory'], filter_asset(type, asset)),
+        iter_asset(tower=src_tower, type=type, start_from=start_from, query=query, limit=limit),
+        export_options['workers']
+    )
+
+def inventory_shard_names() -> dict:
+
+    # Inventory names are only unique within an organization, so shards are
+    # keyed by inventory id and named after the organization as well.
+    organizations = {
+        organization['id']: organization['name']
+        for organization in iter_asset(tower=src_tower, type='organization', fields=['id', 'name'])
+    }
+    return {
+        inventory['id']: f"{organizations.get(inventory['organization'], inventory['organization'])}-{inventory['id']}-{inventory['name']}"
+        for inventory in iter_asset(tower=src_tower, type='inventory', fields=['id', 'name', 'organization'])
+    }
+
+def load_variables(text: str):
+    if not text:
+        return None
+    # AWX hands back whatever was saved, and the UI saves JSON; json.loads is
+    # much cheaper than even the C YAML loader. Floats and constants such as
+    # 1e3 or NaN are left to YAML, which reads some of them differently.
+    if text.lstrip()[:1] in ('{', '['):
+        try:
+            return json.loads(text, parse_float=reject_json_number, parse_constant=reject_json_number)
+        except ValueError:
+            pass
+    return yaml.load(text, Loader=SafeLoader)
+
+def serialize_assets(assets: list) -> str:
+    return yaml.dump(assets, Dumper=SafeDumper, indent=2, default_flow_style=False)
+
+@contextmanager
+def replaced_on_success(output_file: str):
+
+    # Output is streamed into a temporary file that replaces output_file only
+    # once everything was written, so a failed run keeps the last good export.
+    try:
+        with open(f"{output_file}.tmp", 'w') as output:
+            yield output
+    except BaseException:
+        os.remove(f"{output_file}.tmp")
+        raise
+    os.replace(f"{output_file}.tmp", output_file)
+
+def write_assets(assets, output_file: str) -> int:
+
+    # Each batch is dumped as its own list, which appends it to the YAML
+    # sequence, so only the current batch has to be held in memory.
+    with replaced_on_success(output_file) as output:
+        count = 0
+        batch = []
+        for asset in assets:
+            batch.append(asset)
+            if len(batch) >= export_options['dump_batch_size']:
+                output.write(serialize_assets(batch))
+                batch = []
+            count += 1
+        if batch:
+            output.write(serialize_assets(batch))
+        if count == 0:
+            output.write("[]\n")
+    return count
+
+def shard_file(output_file: str, shard) -> str:
+    base, extension = os.path.splitext(output_file)
+    if isinstance(shard, int):
+        return f"{base}.{shard:04d}{extension or '.yaml'}"
+    name = re.sub(r'[^\w.-]+', '_', str(shard))
+    return f"{base}.{name}{extension or '.yaml'}"
+
+def write_sharded_assets(assets, output_file: str, split_output: str, workers: int = None, shard_names: dict = None):
+
+    # Batches are serialized in a process pool and written back here in
+    # submission order, so each shard file keeps the listing order. Per
+    # inventory, assets come as (inventory id, asset) pairs and shard_names
+    # maps the ids to file names.
+    per_inventory = split_output == 'inventory'
+    batch_size = export_options['dump_batch_size'] if per_inventory else int(split_output)
+    batches = {}
+    pending = deque()
+    started = set()
+
+    def write_batch(shard, future):
+        name = shard_names.get(shard, shard) if per_inventory else shard
+        with open(shard_file(output_file, name), 'a' if shard in started else 'w') as output:
+            output.write(future.result())
+        started.add(shard)
+
+    # Spawned rather than forked: the filter threads and pooled sessions are
+    # still running while batches are handed out.
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        max_pending = 2 * workers
+
+        def flush(shard):
+            pending.append((shard, pool.submit(serialize_assets, batches.pop(shard))))
+            while len(pending) > max_pending:
+                write_batch(*pending.popleft())
+
+        for index, asset in enumerate(assets):
+            if per_inventory:
+                shard, asset = asset
+            else:
+                shard = index // batch_size
+            batches.setdefault(shard, []).append(asset)
+            if len(batches[shard]) >= batch_size:
+                flush(shard)
+        for shard in list(batches):
+            flush(shard)
+        while pending:
+            write_batch(*pending.popleft())
+
+    log.info("Wrote %s shard files next to %s.", len(started), output_file)
 
-    assets = [
-        filter_asset(type, asset)
-        for asset in list_asset(tower=src_tower, type=type, start_from=start_from, query=query, limit=limit)
-    ]
+def load_export_state(state_file: str) -> dict:
 
-    return assets
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file, 'r') as file:
+        return json.load(file)
+
+def save_export_state(state_file: str, state: dict):
+
+    with open(f"{state_file}.tmp", 'w') as file:
+        json.dump(state, file)
+    os.replace(f"{state_file}.tmp", state_file)
+
+def retrieve_tracked_assets(type: str, type_state: dict, query: str = None):
+
+    # Filters like retrieve_assets, recording each asset's name under its
+    # source ID and the highest modified timestamp seen into type_state.
+    for id, modified, new_asset in ordered_map(
+        lambda asset: (asset['id'], asset['modified'], filter_asset(type, asset)),
+        iter_asset(tower=src_tower, type=type, query=query),
+        export_options['workers']
+    ):
+        type_state['ids'][str(id)] = new_asset.get('name')
+        if type_state['modified'] is None or modified > type_state['modified']:
+            type_state['modified'] = modified
+        yield str(id), new_asset
+
+# Exported with related data (group hosts, workflow nodes, job template
+# credentials and surveys) whose changes leave the asset's own modified alone.
+related_output_types = ['groups', 'job_template', 'workflow_job_templates', 'workflow_nodes']
+
+def load_exported_assets(type_state: dict, output_file: str):
+
+    # The output has no IDs, but type_state['ids'] lists them in output order,
+    # which pairs every exported asset with its source ID even when names
+    # repeat across organizations.
+    with open(output_file, 'r') as file:
+        assets = yaml.load(file, Loader=SafeLoader) or []
+    if len(assets) != len(type_state['ids']):
+        return None
+    return dict(zip(type_state['ids'], assets))
+
+def export_incrementally(type: str, output_file: str, state_file: str, query: str = None, since: str = None):
+
+    state = load_export_state(state_file)
+    type_state = state.get(type)
+    since = since or (type_state or {}).get('modified')
+
+    exported = None
+    if type in related_output_types:
+        log.warning("Exported %s include related data that modified timestamps do not track, exporting everything.", type)
+    elif type_state is None or since is None or type_state.get('keyed_by') != 'id' or not os.path.exists(output_file):
+        log.info("No checkpoint for %s, exporting everything.", type)
+    else:
+        exported = load_exported_assets(type_state, output_file)
+        if exported is None:
+            log.warning("%s does not match the checkpoint in %s, exporting everything.", output_file, state_file)
+
+    if exported is None:
+        type_state = {'modified': None, 'keyed_by': 'id', 'ids': {}}
+        write_assets((new_asset for id, new_asset in retrieve_tracked_assets(type, type_state, query=query)), output_file)
+    else:
+        log.info("Exporting %s modified after %s.", type, since)
+        current_ids = { str(asset['id']) for asset in iter_asset(tower=src_tower, type=type, query=query, fields=['id']) }
+        for id in set(type_state['ids']) - current_ids:
+            log.info("Asset %s was deleted.", type_state['ids'].pop(id))
+            exported.pop(id, None)
+
+        changed_query = join_query(query, f"modified__gt={quote(since)}")
+        for id, new_asset in retrieve_tracked_assets(type, type_state, query=changed_query):
+            exported[id] = new_asset
+        type_state['ids'] = { id: type_state['ids'][id] for id in exported }
+
+        write_assets(exported.values(), output_file)
+
+    # Saved only once the output was replaced, so a failed run leaves both
+    # the previous export and its checkpoint in place.
+    state[type] = type_state
+    save_export_state(state_file, state)
+
+async def async_filter_asset(type: str, asset: dict) -> dict:
+
+    urls = related_urls(type, asset)
+    fetched = await asyncio.gather(*(
+        awx_porting.async_get_asset(src_tower, url, modified=modified)
+        for url, modified in urls.values()
+    ))
+    if type == "groups" and export_options['bulk_group_hosts']:
+        await asyncio.to_thread(get_inventory_group_hosts, asset['inventory'])
+    return filter_asset(type, asset, related=dict(zip(urls, fetched)))
+
+async def async_write_assets(type: str, output_file: str, limit: int = -1, query: str = None, start_from: int = 0) -> int:
+
+    with replaced_on_success(output_file) as output:
+        count = 0
+        async for assets in awx_porting.async_iter_asset_pages(src_tower, type, query=query, start_from=start_from, limit=limit):
+            if assets:
+                filtered = await asyncio.gather(*(async_filter_asset(type, asset) for asset in assets))
+                output.write(serialize_assets(filtered))
+                count += len(filtered)
+        if count == 0:
+            output.write("[]\n")
+    return count
+
+def load_config(config_file: str):
+
+    with open(config_file, 'r') as file:
+        config_data = yaml.safe_load(file)
+        if 'src_tower' in config_data:
+            src_tower.update(config_data['src_tower'])
+        if 'standard_headers' in config_data:
+            standard_headers.update(config_data['standard_headers'])
+        if 'baseurls' in config_data:
+            baseurls.update(config_data['baseurls'])
+        if 'listing' in config_data:
+            awx_porting.listing_options.update(config_data['listing'])
+        if 'disk_cache' in config_data:
+            awx_porting.disk_cache_options.update(config_data['disk_cache'])
+        if 'asset_cache' in config_data:
+            awx_porting.asset_cache.resize(**config_data['asset_cache'])
+        if 'async' in config_data:
+            awx_porting.async_options.update(config_data['async'])
+
+shard_asset_types = ['hosts', 'groups', 'inventory_sources']
+
+def init_shard_worker(config_file: str, log_level: str, options: dict):
+
+    logging.basicConfig(level=log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
+    load_config(config_file)
+    export_options.update(options['export'])
+    awx_porting.async_options.update(options['async'])
+
+def export_shard(type: str, inventory: dict, output_file: str, query: str, cache: dict, use_async: bool) -> tuple:
+
+    # Runs in a pool process, which may export several inventories in turn,
+    # so the request metrics of this shard alone are handed back each time.
+    awx_porting.request_metrics.reset()
+    awx_porting.configure_disk_cache(src_tower, **cache)
+    shard_query = join_query(query, f"inventory={inventory['id']}")
+    try:
+        if use_async:
+            count = awx_porting.run_async(async_write_assets, type=type, output_file=output_file, query=shard_query)
+        else:
+            count = write_assets(retrieve_assets(type=type, query=shard_query), output_file)
+    finally:
+        awx_porting.close_disk_caches()
+    return count, awx_porting.request_metrics.as_dict()
+
+def export_sharded(type: str, output_file: str, query: str, shard_options: dict, workers: int = None, merge: bool = False) -> list:
+
+    # Inventories are independent for these types, so each one is exported by
+    # its own process; a failing inventory keeps its previous shard file and
+    # the others carry on.
+    inventories = list(iter_asset(tower=src_tower, type='inventory', fields=['id', 'name']))
+    log.info("Exporting %s for %s inventories.", type, len(inventories))
+    # Inventory names are only unique within an organization, so the ID keeps
+    # two shards from writing the same file.
+    shard_files = { inventory['id']: shard_file(output_file, f"{inventory['id']}-{inventory['name']}") for inventory in inventories }
+    counts = {}
+    failures = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=context,
+                             initializer=init_shard_worker, initargs=shard_options['init']) as pool:
+        futures = {
+            pool.submit(export_shard, type, inventory, shard_files[inventory['id']], query, shard_options['cache'], shard_options['use_async']): inventory
+            for inventory in inventories
+        }
+        for future in as_completed(futures):
+            inventory = futures[future]
+            try:
+                counts[inventory['id']], metrics = future.result()
+                awx_porting.request_metrics.merge(metrics)
+                log.info("Exported %s %s of inventory %s.", counts[inventory['id']], type, inventory['name'])
+            except Exception as error:
+                log.error("Export of %s for inventory %s failed: %s", type, inventory['name'], error)
+                failures.append((inventory['name'], error))
+
+    if failures:
+        log.error("%s of %s inventories failed: %s", len(failures), len(inventories), ", ".join(name for name, error in failures))
+        if merge:
+            log.error("Keeping the previous %s and the shard files, as merging now would leave the failed inventories out.", output_file)
+    elif merge:
+        # Shards are appended in inventory listing order, whatever order they finished in.
+        with replaced_on_success(output_file) as output:
+            for inventory in inventories:
+                if counts.get(inventory['id']):
+                    with open(shard_files[inventory['id']], 'r') as shard:
+                        output.write(shard.read())
+            if not any(counts.values()):
+                output.write("[]\n")
+        for inventory in inventories:
+            if inventory['id'] in counts:
+                os.remove(shard_files[inventory['id']])
+
+    return failures
 
 def main():
 
@@ -132,8 +561,33 @@ def main():
     parser.add_argument('-x', '--exclude', type=str, action='store', help='Exclude item name from porting')
     parser.add_argument('-s', '--start-from', type=int, action='store', help='Start from item number', default=0)
     parser.add_argument('-o', '--output-file', type=str, action='store', help='Output yaml file', required=False)
+    parser.add_argument('-w', '--workers', type=int, action='store', default=1, help='Number of assets filtered concurrently, with their related fetches')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Use the asyncio/httpx engine instead of blocking requests')
+    parser.add_argument('--async-concurrency', type=int, action='store', help='Maximum requests in flight with --async')
+    parser.add_argument('--cache-dir', type=str, action='store', help='Persistent source tower response cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the persistent response cache')
+    parser.add_argument('--state-file', type=str, action='store', help='Incremental export checkpoint; only assets modified since the last run are fetched and merged into the output file')
+    parser.add_argument('--since', type=str, action='store', help='Only export assets modified after this timestamp')
+    parser.add_argument('--log-level', type=str, action='store', default='INFO', help='Logging level, DEBUG shows every request')
+    parser.add_argument('--metrics-file', type=str, action='store', help='Write request metrics as JSON, or Prometheus textfile format if the name ends in .prom')
+    parser.add_argument('--split-output', type=str, action='store', help="Write one file per inventory ('inventory') or per N assets next to the output file instead of a single file")
+    parser.add_argument('--dump-workers', type=int, action='store', help='Processes serializing --split-output files, defaults to the CPU count')
+    parser.add_argument('--shard-by', type=str, action='store', choices=['inventory'], help=f"Export each inventory in its own process and output file, for {', '.join(shard_asset_types)}")
+    parser.add_argument('--shard-workers', type=int, action='store', help='Processes exporting shards concurrently, defaults to the CPU count')
+    parser.add_argument('--merge-shards', action='store_true', help='Merge the shard files into the output file, in inventory order')
+    parser.add_argument('-b', '--bulk-group-hosts', action='store_true', help='Resolve group hosts from one inventory script per inventory instead of one all_hosts request per group')
 
     args = parser.parse_args()
+    if args.split_output and args.split_output != 'inventory' and not args.split_output.isdigit():
+        parser.error("--split-output must be 'inventory' or a number of assets")
+    if args.split_output and (args.state_file or args.use_async):
+        parser.error("--split-output cannot be combined with --state-file or --async")
+    if args.split_output == 'inventory' and args.asset_type not in shard_asset_types:
+        parser.error(f"--split-output inventory only applies to {', '.join(shard_asset_types)}")
+    if args.shard_by and (args.asset_type not in shard_asset_types or args.state_file or args.split_output):
+        parser.error(f"--shard-by only applies to {', '.join(shard_asset_types)} and cannot be combined with --state-file or --split-output")
+    if args.shard_by and (args.limit != -1 or args.start_from):
+        parser.error("--shard-by cannot be combined with --limit or --start-from")
     dry_run = args.dry_run
     asset_type = args.asset_type
     limit = args.limit
@@ -141,29 +595,54 @@ def main():
     query = args.query
     exclude = args.exclude
     start_from = args.start_from
+    if exclude is not None:
+        query = join_query(query, f"not__name={quote(exclude)}")
+    if args.since and not args.state_file:
+        query = join_query(query, f"modified__gt={quote(args.since)}")
     output_file = args.output_file or f"./{asset_type}.assets.yaml"
+    export_options['bulk_group_hosts'] = args.bulk_group_hosts
+    export_options['workers'] = args.workers
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
 
-    config_data = dict()
-    with open(config_file, 'r') as file:
-        config_data = yaml.safe_load(file)
-        if 'src_tower' in config_data:
-            src_tower.update(config_data['src_tower'])
-        if 'standard_headers' in config_data:
-            standard_headers.update(config_data['standard_headers'])
-        if 'baseurls' in config_data:
-            baseurls.update(config_data['baseurls'])
+    load_config(config_file)
 
-    assets = []
+    if args.async_concurrency is not None:
+        awx_porting.async_options['concurrency'] = args.async_concurrency
 
     requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+    exit_status = 0
     valid_asset_types = baseurls.keys()
     if asset_type in valid_asset_types:
-        assets = retrieve_assets(type=asset_type, limit=limit, query=query, start_from=start_from, exclude=exclude, dry_run=dry_run)
-        with open(output_file, 'w') as output:
-            yaml.safe_dump(assets, output, indent=2, default_flow_style=False)
+        awx_porting.configure_disk_cache(src_tower, cache_dir=args.cache_dir, no_cache=args.no_cache)
+        try:
+            if args.shard_by:
+                shard_options = {
+                    'init': (config_file, args.log_level, {'export': dict(export_options), 'async': dict(awx_porting.async_options)}),
+                    'cache': {'cache_dir': args.cache_dir, 'no_cache': args.no_cache},
+                    'use_async': args.use_async,
+                }
+                if export_sharded(type=asset_type, output_file=output_file, query=query, shard_options=shard_options, workers=args.shard_workers, merge=args.merge_shards):
+                    exit_status = 1
+            elif args.state_file:
+                export_incrementally(type=asset_type, output_file=output_file, state_file=args.state_file, query=query, since=args.since)
+            elif args.use_async:
+                awx_porting.run_async(async_write_assets, type=asset_type, output_file=output_file, limit=limit, query=query, start_from=start_from)
+            else:
+                if args.split_output == 'inventory':
+                    assets = retrieve_assets_by_inventory(type=asset_type, limit=limit, query=query, start_from=start_from)
+                    write_sharded_assets(assets, output_file, args.split_output, args.dump_workers, shard_names=inventory_shard_names())
+                elif args.split_output:
+                    assets = retrieve_assets(type=asset_type, limit=limit, query=query, start_from=start_from, exclude=exclude, dry_run=dry_run)
+                    write_sharded_assets(assets, output_file, args.split_output, args.dump_workers)
+                else:
+                    assets = retrieve_assets(type=asset_type, limit=limit, query=query, start_from=start_from, exclude=exclude, dry_run=dry_run)
+                    write_assets(assets, output_file)
+        finally:
+            awx_porting.report_run(args.metrics_file)
     else:
         print(f"Asset type {asset_type} is not valid. Valid types are : {valid_asset_types}")
         parser.print_help()
+    return exit_status
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
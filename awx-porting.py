@@ -1,10 +1,30 @@
 #!/usr/bin/python3
 
 import argparse
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
 import requests
-from urllib.parse import quote
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import quote, urlparse
 import yaml, json
 
+# Optional, only needed for --async (see requirements.txt)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+log = logging.getLogger('awx-porting')
 
 src_tower = { 'url': 'old-tower.example.com', 'usr': 'username', 'pwd': 'password', 'verifyssl': True }
 dst_tower = { 'url': 'new-tower.example.com', 'usr': 'username', 'pwd': 'password', 'verifyssl': True }
@@ -71,6 +91,7 @@ keys_to_keep = {
 
 keys_to_map = {
     "inventory": [ ],
+    "inventory_sources": [ 'inventory' ],
     "groups": [ 'inventory' ],
     "hosts": [ 'inventory' ],
     "job_template": [ 'inventory', 'project' ],
@@ -88,87 +109,638 @@ related_asset_types = {
     "hosts": ["groups"]
 }
 
+# Ordering constraints that keys_to_map and related_asset_types cannot express:
+# inventory sources live in an inventory, and workflow nodes point at job
+# templates that have to exist first.
+extra_asset_dependencies = {
+    "inventory_sources": ['inventory'],
+    "workflow_job_templates": ['job_template'],
+}
+
+# Fields that identify an asset on the destination, used by the prefetched
+# destination index. Types not listed are identified by name.
+natural_keys = {
+    "groups": ['name', 'inventory'],
+    "hosts": ['name', 'inventory'],
+    "inventory_sources": ['name', 'inventory'],
+}
+
 related_asset_query_keys = {
     "hosts": ['inventory'],
     # "groups": ['name', 'inventory']
 }
 
-asset_cache = {}
+listing_options = {
+    "page_size": 200,
+    "concurrency": 1,
+}
+
+# AWX silently caps page_size at its MAX_PAGE_SIZE setting, 200 by default.
+max_page_size = 200
+
+def listing_page_size() -> int:
+    return max(1, min(listing_options['page_size'], max_page_size))
+
+def check_page_size(response_data: dict, page_size: int, url: str):
+
+    # Page numbers and offsets are computed from page_size, so a tower that
+    # returns shorter pages would make whole pages go missing.
+    if response_data.get('next') is not None and len(response_data['results']) != page_size:
+        raise RuntimeError(
+            f"{url} returned {len(response_data['results'])} assets per page instead of {page_size}, "
+            f"set listing.page_size to the tower's MAX_PAGE_SIZE"
+        )
+
+# In-memory LRU cache of tower responses. Keys are namespaced by tower so src
+# and dst entries never collide, and the cache is bounded both by entry count
+# and by the size of the raw JSON responses it holds.
+class AssetCache:
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def counters(self, namespace: str) -> dict:
+        return self.stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0})
+
+    def get(self, tower: dict, url: str):
+        key = (tower['url'], url)
+        with self.lock:
+            if key not in self.entries:
+                self.counters(tower['url'])['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters(tower['url'])['hits'] += 1
+            return self.entries[key][0]
+
+    def put(self, tower: dict, url: str, value, size: int = 0):
+        key = (tower['url'], url)
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            self.counters(tower['url'])['stored'] += 1
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                (namespace, _), (_, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                self.counters(namespace)['evicted'] += 1
+
+    def resize(self, max_entries: int = None, max_bytes: int = None):
+        with self.lock:
+            self.max_entries = max_entries or self.max_entries
+            self.max_bytes = max_bytes or self.max_bytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def summary(self) -> str:
+        return "\n".join(
+            f"Memory cache for {namespace} -- " + ", ".join(f"{key}: {value}" for key, value in counters.items())
+            for namespace, counters in self.stats.items()
+        )
+
+asset_cache = AssetCache()
+
+# Per endpoint counters for every request sent to a tower: count, errors,
+# bytes, a latency histogram and cache hits/misses, keyed by method, endpoint
+# template (IDs replaced by {id}) and the asset type owning the endpoint.
+class RequestMetrics:
+
+    buckets = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.templates = {}
+
+    def endpoint(self, method: str, url: str) -> tuple:
+        path = urlparse(url).path
+        if path not in self.templates:
+            template = re.sub(r'(?<=/)\d+(?=/)', '{id}', path)
+            owners = [ type for type, baseurl in baseurls.items() if template.startswith(baseurl) ]
+            self.templates[path] = (template, max(owners, key=lambda type: len(baseurls[type])) if owners else 'other')
+        return (method, *self.templates[path])
+
+    def counters(self, key: tuple) -> dict:
+        if key not in self.endpoints:
+            self.endpoints[key] = {
+                'count': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                'histogram': [0] * (len(self.buckets) + 1), 'cache_hits': 0, 'cache_misses': 0, 'coalesced': 0,
+            }
+        return self.endpoints[key]
+
+    def record(self, method: str, url: str, seconds: float, size: int = 0, error: bool = False):
+        key = self.endpoint(method, url)
+        with self.lock:
+            counters = self.counters(key)
+            counters['count'] += 1
+            counters['errors'] += int(error)
+            counters['bytes'] += size
+            counters['seconds'] += seconds
+            counters['max_seconds'] = max(counters['max_seconds'], seconds)
+            counters['histogram'][next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))] += 1
+
+    def cache(self, url: str, hit: bool):
+        key = self.endpoint('GET', url)
+        with self.lock:
+            self.counters(key)['cache_hits' if hit else 'cache_misses'] += 1
+
+    def coalesce(self, url: str):
+        key = self.endpoint('GET', url)
+        with self.lock:
+            self.counters(key)['coalesced'] += 1
+
+    def table(self) -> str:
+        lines = [f"{'method':<6} {'endpoint':<55} {'type':<28} {'count':>7} {'errors':>6} {'MiB':>8} {'avg ms':>8} {'max ms':>8} {'hits':>7} {'misses':>7} {'shared':>7}"]
+        for (method, template, type), counters in sorted(self.endpoints.items()):
+            average = counters['seconds'] / counters['count'] * 1000 if counters['count'] else 0
+            lines.append(
+                f"{method:<6} {template:<55} {type:<28} {counters['count']:>7} {counters['errors']:>6} "
+                f"{counters['bytes'] / 1048576:>8.2f} {average:>8.1f} {counters['max_seconds'] * 1000:>8.1f} "
+                f"{counters['cache_hits']:>7} {counters['cache_misses']:>7} {counters['coalesced']:>7}"
+            )
+        return "\n".join(lines)
+
+    def as_dict(self) -> list:
+        return [
+            {'method': method, 'endpoint': template, 'asset_type': type, 'buckets': self.buckets, **counters}
+            for (method, template, type), counters in sorted(self.endpoints.items())
+        ]
+
+    # Folds in as_dict() records from another process, e.g. an export shard.
+    def merge(self, records: list):
+        with self.lock:
+            for record in records:
+                counters = self.counters((record['method'], record['endpoint'], record['asset_type']))
+                for name in ['count', 'errors', 'bytes', 'seconds', 'cache_hits', 'cache_misses', 'coalesced']:
+                    counters[name] += record[name]
+                counters['max_seconds'] = max(counters['max_seconds'], record['max_seconds'])
+                counters['histogram'] = [ a + b for a, b in zip(counters['histogram'], record['histogram']) ]
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+    def prometheus(self) -> str:
+        lines = []
+        for name, kind in [
+            ('requests_total', 'counter'), ('request_errors_total', 'counter'), ('response_bytes_total', 'counter'),
+            ('cache_hits_total', 'counter'), ('cache_misses_total', 'counter'), ('coalesced_requests_total', 'counter'),
+            ('request_duration_seconds', 'histogram'),
+        ]:
+            lines.append(f"# TYPE awx_porting_{name} {kind}")
+        for (method, template, type), counters in sorted(self.endpoints.items()):
+            labels = f'method="{method}",endpoint="{template}",asset_type="{type}"'
+            lines.append(f"awx_porting_requests_total{{{labels}}} {counters['count']}")
+            lines.append(f"awx_porting_request_errors_total{{{labels}}} {counters['errors']}")
+            lines.append(f"awx_porting_response_bytes_total{{{labels}}} {counters['bytes']}")
+            lines.append(f"awx_porting_cache_hits_total{{{labels}}} {counters['cache_hits']}")
+            lines.append(f"awx_porting_cache_misses_total{{{labels}}} {counters['cache_misses']}")
+            lines.append(f"awx_porting_coalesced_requests_total{{{labels}}} {counters['coalesced']}")
+            cumulative = 0
+            for bound, count in zip(self.buckets + ['+Inf'], counters['histogram']):
+                cumulative += count
+                lines.append(f'awx_porting_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"awx_porting_request_duration_seconds_sum{{{labels}}} {counters['seconds']}")
+            lines.append(f"awx_porting_request_duration_seconds_count{{{labels}}} {counters['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        with open(f"{path}.tmp", 'w') as file:
+            if path.endswith('.prom'):
+                file.write(self.prometheus())
+            else:
+                json.dump(self.as_dict(), file, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+request_metrics = RequestMetrics()
+
+# Single-flight for cache misses: the first caller of a URL loads it, the
+# callers that ask for the same URL meanwhile wait for that load and get its
+# result, or its exception, instead of sending the same request again.
+class InFlightRequests:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.futures = {}
+        self.stats = {'loads': 0, 'coalesced': 0}
+
+    def do(self, url: str, function):
+        with self.lock:
+            call = self.calls.get(url)
+            leader = call is None
+            if leader:
+                call = self.calls[url] = {'done': threading.Event()}
+            self.stats['loads' if leader else 'coalesced'] += 1
+        if not leader:
+            request_metrics.coalesce(url)
+            call['done'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['result']
+        try:
+            call['result'] = function()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[url]
+            call['done'].set()
+
+    # Same for the async engine, where everything runs on one event loop.
+    async def async_do(self, url: str, coroutine_function):
+        future = self.futures.get(url)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            request_metrics.coalesce(url)
+            return await asyncio.shield(future)
+        self.stats['loads'] += 1
+        future = self.futures[url] = asyncio.get_running_loop().create_future()
+        try:
+            result = await coroutine_function()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Marks the exception as retrieved when nobody was waiting.
+            future.exception()
+            raise
+        finally:
+            del self.futures[url]
+
+    def summary(self) -> str:
+        return f"In-flight requests -- loads: {self.stats['loads']}, coalesced: {self.stats['coalesced']}"
+
+in_flight_requests = InFlightRequests()
+
+def report_run(metrics_file: str = None):
+
+    log.info("%s", asset_cache.summary())
+    log.info("%s", in_flight_requests.summary())
+    close_disk_caches()
+    print(request_metrics.table())
+    if metrics_file:
+        request_metrics.dump(metrics_file)
+
+writer_options = {
+    "workers": 1,
+    "rate": 0,
+    "burst": 1,
+}
+
+async_options = {
+    "concurrency": 20,
+}
+
+disk_cache_options = {
+    "path": None,
+    "ttl": 86400,
+    "max_bytes": 512 * 1024 * 1024,
+}
+
+disk_caches = {}
+
+sessions = {}
+sessions_lock = threading.Lock()
+
+retry_status_codes = [429, 500, 502, 503, 504]
+
+def get_session(tower: dict) -> requests.Session:
+
+    with sessions_lock:
+        if tower['url'] not in sessions:
+            sessions[tower['url']] = new_session(tower)
+
+    return sessions[tower['url']]
+
+def new_session(tower: dict) -> requests.Session:
+
+    retry = Retry(
+        total=tower.get('retries', 3),
+        backoff_factor=tower.get('backoff_factor', 0.5),
+        status_forcelist=retry_status_codes,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=tower.get('pool_size', 10), max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.auth = (tower['usr'], tower['pwd'])
+    session.verify = tower['verifyssl']
+    session.headers.update(standard_headers)
+    if not tower.get('keepalive', True):
+        session.headers.update({'Connection': 'close'})
+
+    return session
+
+def tower_request(tower: dict, method: str, url: str, **kwargs) -> requests.Response:
+
+    start = time.perf_counter()
+    try:
+        response = get_session(tower).request(method, url, timeout=tower.get('timeout', 30), **kwargs)
+    except requests.RequestException:
+        request_metrics.record(method, url, time.perf_counter() - start, error=True)
+        raise
+    request_metrics.record(method, url, time.perf_counter() - start, len(response.content), error=response.status_code >= 400)
+    return response
+
+# Persistent response cache keyed by URL, stored as compressed JSON in SQLite.
+# Entries stored with a `modified` validator stay valid while the caller passes
+# the same value; the others expire after `ttl` seconds. Least recently used
+# entries are evicted once the stored data exceeds `max_bytes`.
+class DiskCache:
+
+    evict_every = 100
+
+    def __init__(self, path: str, ttl: int = 86400, max_bytes: int = 512 * 1024 * 1024):
+        os.makedirs(path, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Several processes may share the cache (asset2yaml.py --shard-by), so
+        # writes are committed right away and wait for each other's locks.
+        self.db = sqlite3.connect(os.path.join(path, 'asset_cache.sqlite'), timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, modified TEXT, stored REAL, accessed REAL, size INTEGER, data BLOB)"
+        )
+        self.db.execute("DELETE FROM responses WHERE modified IS NULL AND stored < ?", (time.time() - ttl,))
+        self.db.commit()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self.pending_writes = 0
+        self.accessed = {}
+
+    def get(self, url: str, modified: str = None):
+        with self.lock:
+            row = self.db.execute("SELECT modified, stored, data FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            cached_modified, stored, data = row
+            if modified is not None and cached_modified is not None:
+                if cached_modified != modified:
+                    self.stats['misses'] += 1
+                    return None
+                self.stats['revalidated'] += 1
+            elif time.time() - stored > self.ttl:
+                self.stats['misses'] += 1
+                return None
+            else:
+                self.stats['hits'] += 1
+            # Access times only order evictions, so they are written in batches.
+            self.accessed[url] = time.time()
+            if len(self.accessed) >= self.evict_every:
+                self.write_accessed()
+        # The decompressed size is what the response takes in the memory cache.
+        data = zlib.decompress(data)
+        return json.loads(data), len(data)
+
+    def put(self, url: str, data, modified: str = None):
+        blob = zlib.compress(json.dumps(data).encode())
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (url, modified, stored, accessed, size, data) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, modified, now, now, len(blob), blob)
+            )
+            self.db.commit()
+            self.stats['stored'] += 1
+            self.pending_writes += 1
+            if self.pending_writes >= self.evict_every:
+                self.evict()
+
+    def write_accessed(self):
+        self.db.executemany("UPDATE responses SET accessed = ? WHERE url = ?", [ (accessed, url) for url, accessed in self.accessed.items() ])
+        self.db.commit()
+        self.accessed.clear()
+
+    def evict(self):
+        self.write_accessed()
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            for url, size in self.db.execute("SELECT url, size FROM responses ORDER BY accessed").fetchall():
+                self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.stats['evicted'] += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self.db.commit()
+        self.pending_writes = 0
+
+    def close(self):
+        with self.lock:
+            self.evict()
+            self.db.close()
+
+    def summary(self) -> str:
+        return ", ".join(f"{key}: {value}" for key, value in self.stats.items())
+
+def configure_disk_cache(tower: dict, cache_dir: str = None, no_cache: bool = False):
+
+    path = cache_dir or disk_cache_options['path']
+    if path is not None and not no_cache:
+        disk_caches[tower['url']] = DiskCache(path, ttl=disk_cache_options['ttl'], max_bytes=disk_cache_options['max_bytes'])
+
+def close_disk_caches():
+
+    for url, disk_cache in disk_caches.items():
+        log.info("Disk cache for %s -- %s", url, disk_cache.summary())
+        disk_cache.close()
+    disk_caches.clear()
+
+def ordered_map(function, items, workers: int):
+
+    if workers <= 1:
+        yield from map(function, items)
+        return
+
+    # Keep at most `workers` items in flight so memory stays bounded when the
+    # consumer is slower than the tower, and yield results in input order.
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(function, item) for item in islice(items, workers))
+        while pending:
+            result = pending.popleft().result()
+            for item in islice(items, 1):
+                pending.append(executor.submit(function, item))
+            yield result
+
+def unordered_map(function, items, workers: int):
+
+    if workers <= 1:
+        yield from map(function, items)
+        return
+
+    # Like ordered_map, but yields results as they complete and refills the
+    # pool right away, so one slow item does not hold back the others.
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = { executor.submit(function, item) for item in islice(items, workers) }
+        while running:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for item in islice(items, len(finished)):
+                running.add(executor.submit(function, item))
+            for future in finished:
+                yield future.result()
 
 def get_baseurl(tower: dict, type: str) -> str:
     return f"{tower['url']}{baseurls[type]}"
 
-def list_asset(tower: dict, type: str, query: str = None, start_from: int = 0, limit: int = -1) -> list:
+def join_query(*queries) -> str:
+    return "&".join(query for query in queries if query) or None
+
+def trim_page(response_data: dict, fields: list = None) -> dict:
+
+    # AWX has no sparse fieldsets, so listings that only need a few fields
+    # drop the rest as soon as each page is parsed.
+    if fields is not None and 'results' in response_data:
+        response_data['results'] = [
+            { key: asset[key] for key in fields if key in asset }
+            for asset in response_data['results']
+        ]
+    return response_data
+
+def fetch_page(tower: dict, type: str, url: str, fields: list = None) -> dict:
+
+    log.debug("Listing assets of type %s from %s", type, url)
+    response = tower_request(tower, 'GET', url)
+    response.raise_for_status()
+    return trim_page(response.json(), fields)
+
+def list_asset(tower: dict, type: str, query: str = None, start_from: int = 0, limit: int = -1, fields: list = None) -> list:
+
+    return list(iter_asset(tower=tower, type=type, query=query, start_from=start_from, limit=limit, fields=fields))
+
+def iter_asset(tower: dict, type: str, query: str = None, start_from: int = 0, limit: int = -1, fields: list = None):
 
-    page_size = 200
+    page_size = listing_page_size()
 
     baseurl = f"{get_baseurl(tower, type)}?page_size={page_size}"
     if query is not None:
         baseurl = f"{baseurl}&{query}"
 
-    asset_list = []
-    while True:
-        print(f"Listing assets of type {type} from {baseurl}")
-        response = requests.get(
-            url=baseurl,
-            headers=standard_headers,
-            auth=(tower['usr'], tower['pwd']),
-            verify=tower['verifyssl']
-        )
-        response.raise_for_status()
-        response_data = response.json()
+    if listing_options['concurrency'] > 1:
+        pages = iter_pages_concurrently(tower, type, baseurl, start_from, limit, fields)
+        position = (start_from // page_size) * page_size
+    else:
+        pages = iter_pages(tower, type, baseurl, fields)
+        position = 0
+
+    emitted = 0
+    for response_data in pages:
+        for asset in response_data.get('results', []):
+            if position >= start_from:
+                if 0 < limit <= emitted:
+                    return
+                yield asset
+                emitted += 1
+            position += 1
+        if 0 < limit <= emitted:
+            return
 
-        if 'results' in response_data:
-            asset_list.extend(response_data['results'])
+def iter_pages(tower: dict, type: str, baseurl: str, fields: list = None):
 
-        if 'next' in response_data and response_data['next'] is not None and ((len(asset_list) - start_from) < limit or limit <= 0):
+    while True:
+        response_data = fetch_page(tower, type, baseurl, fields)
+        yield response_data
+
+        if 'next' in response_data and response_data['next'] is not None:
             baseurl = f"{tower['url']}{response_data['next']}"
         else:
             break
 
-    if limit > 0:
-        return asset_list[start_from:limit+start_from]
-    return asset_list[start_from:]
+def iter_pages_concurrently(tower: dict, type: str, baseurl: str, start_from: int = 0, limit: int = -1, fields: list = None):
+
+    page_size = listing_page_size()
+    first_page = start_from // page_size + 1
+
+    log.debug("Listing assets of type %s from %s&page=%s", type, baseurl, first_page)
+    response = tower_request(tower, 'GET', f"{baseurl}&page={first_page}")
+    if response.status_code == 404:
+        # AWX answers 404 for pages past the end, so start_from is beyond count
+        return
+    response.raise_for_status()
+    response_data = trim_page(response.json(), fields)
+    check_page_size(response_data, page_size, baseurl)
+    yield response_data
+
+    end = response_data['count'] if limit <= 0 else min(response_data['count'], start_from + limit)
+    if end <= start_from:
+        return
+    last_page = (end - 1) // page_size + 1
+
+    yield from ordered_map(
+        lambda page: fetch_page(tower, type, f"{baseurl}&page={page}", fields),
+        range(first_page + 1, last_page + 1),
+        listing_options['concurrency']
+    )
+
+def get_asset(tower: dict, relative_url: str = None, modified: str = None) -> dict:
 
-def get_asset(tower: dict, relative_url: str = None) -> dict:
+    url = f"{tower['url']}{relative_url}"
+    cached_asset = asset_cache.get(tower, url)
+    if cached_asset is not None:
+        log.debug("Getting asset from cached %s", url)
+        request_metrics.cache(url, hit=True)
+        return cached_asset
+    return in_flight_requests.do(url, lambda: load_asset(tower, url, modified))
+
+def load_asset(tower: dict, url: str, modified: str = None) -> dict:
 
-    baseurl = tower['url']
     asset = {}
+    disk_cache = disk_caches.get(tower['url'])
 
-    url = f"{baseurl}{relative_url}"
-    if url in asset_cache:
-        print(f"Getting asset from cached {url}")
-        asset = asset_cache[url]
-    else:
-        while True:
-            print(f"Getting asset from {url}")
-            response = requests.get(
-                url=url,
-                headers=standard_headers,
-                auth=(tower['usr'], tower['pwd']),
-                verify=tower['verifyssl']
-            )
-            response.raise_for_status()
-            response_data = response.json()
+    cached = disk_cache.get(url, modified) if disk_cache is not None else None
+    request_metrics.cache(url, hit=cached is not None)
+    if cached is not None:
+        log.debug("Getting asset from disk cache %s", url)
+        cached_asset, size = cached
+        asset_cache.put(tower, url, cached_asset, size)
+        return cached_asset
 
-            if 'results' in asset:
-                asset['results'].extend(response_data['results'])
-            else:
-                asset = response_data
+    # Pages are merged into the first response and cached once, under the
+    # URL that was asked for.
+    page_url = url
+    size = 0
+    while True:
+        log.debug("Getting asset from %s", page_url)
+        response = tower_request(tower, 'GET', page_url)
+        response.raise_for_status()
+        response_data = response.json()
+        size += len(response.content)
 
-            asset_cache.update({url: response_data})
+        if 'results' in asset:
+            asset['results'].extend(response_data['results'])
+        else:
+            asset = response_data
 
-            if 'next' in response_data and response_data['next'] is not None:
-                url = f"{tower['url']}{response_data['next']}"
-            else:
-                break
+        if 'next' in response_data and response_data['next'] is not None:
+            page_url = f"{tower['url']}{response_data['next']}"
+        else:
+            break
 
+    asset_cache.put(tower, url, asset, size)
+    if disk_cache is not None:
+        disk_cache.put(url, asset, modified)
     return asset
 
 def search_asset(tower: dict, type: str, **kwargs : dict) -> list:
 
     baseurl = get_baseurl(tower, type)
-    results = []
 
     query = "&".join([
         f"{k}={quote(str(v))}"
@@ -177,47 +749,231 @@ def search_asset(tower: dict, type: str, **kwargs : dict) -> list:
     ])
 
     url = f"{baseurl}?{query}"
-    if url in asset_cache:
-        print(f"Searching cached asset type {type} url {url}")
-        results = asset_cache[url]
-    else:
-        print(f"Searching asset type {type} url {url}")
-        response = requests.get(
-            url=f"{url}", 
-            headers=standard_headers,
-            auth=(tower['usr'], tower['pwd']),
-            verify=tower['verifyssl']
-        )
-        response_data = response.json()
-        if response.status_code != 200:
-            print(response_data)
-            response.raise_for_status()
-        results = response_data['results']
-        asset_cache.update({url: results})
+    cached_results = asset_cache.get(tower, url)
+    if cached_results is not None:
+        log.debug("Searching cached asset type %s url %s", type, url)
+        request_metrics.cache(url, hit=True)
+        return cached_results
+    return in_flight_requests.do(url, lambda: load_search_results(tower, type, url))
 
+def load_search_results(tower: dict, type: str, url: str) -> list:
+
+    log.debug("Searching asset type %s url %s", type, url)
+    request_metrics.cache(url, hit=False)
+    response = tower_request(tower, 'GET', url)
+    response_data = response.json()
+    if response.status_code != 200:
+        log.error("%s", response_data)
+        response.raise_for_status()
+    results = trim_page(response_data, DestinationIndex.kept_fields)['results']
+    # Empty results are not cached: the asset may be created later in the
+    # run, and other types search for it by name.
+    if results:
+        asset_cache.put(tower, url, results, len(response.content))
     return results
 
 
+# In-memory indexes of destination assets by natural key, filled by paging each
+# type once, so lookups no longer need one search_asset request per asset.
+class DestinationIndex:
+
+    kept_fields = ['id', 'name', 'inventory', 'related']
+    names_per_search = 50
+
+    def __init__(self):
+        self.indexes = {}
+        self.complete = set()
+        self.checked = {}
+        self.lock = threading.Lock()
+
+    def key(self, type: str, fields: dict) -> tuple:
+        return tuple(str(fields.get(key)) for key in natural_keys.get(type, ['name']))
+
+    def load(self, tower: dict, type: str):
+        log.info("Indexing destination assets of type %s", type)
+        index = {}
+        for asset in iter_asset(tower=tower, type=type, fields=self.kept_fields):
+            index.setdefault(self.key(type, asset), []).append(asset)
+        with self.lock:
+            self.indexes[type] = index
+            self.complete.add(type)
+
+    # Existence checks for a batch of names: the names still unchecked are
+    # searched with name__in, a few dozen per request. AWX splits the value on
+    # commas, so names containing one are left to search_asset.
+    def unchecked_names(self, type: str, names: list) -> list:
+        with self.lock:
+            checked = self.checked.get(type, set())
+            return sorted({ name for name in names if ',' not in name and name not in checked })
+
+    def name_queries(self, type: str, names: list) -> list:
+        names = self.unchecked_names(type, names)
+        return [
+            (chunk, f"name__in={quote(','.join(chunk))}")
+            for chunk in (names[i:i + self.names_per_search] for i in range(0, len(names), self.names_per_search))
+        ]
+
+    def index_names(self, type: str, names: list, assets: list):
+        found = {}
+        for asset in assets:
+            found.setdefault(self.key(type, asset), []).append(asset)
+        with self.lock:
+            # Server results replace entries added for the same keys, which
+            # they include.
+            self.indexes.setdefault(type, {}).update(found)
+            self.checked.setdefault(type, set()).update(names)
+
+    def load_names(self, tower: dict, type: str, names: list):
+        for chunk, query in self.name_queries(type, names):
+            self.index_names(type, chunk, list_asset(tower=tower, type=type, query=query, fields=self.kept_fields))
+
+    def loaded(self, type: str, name: str = None) -> bool:
+        with self.lock:
+            return type in self.complete or name in self.checked.get(type, ())
+
+    def lookup(self, type: str, **fields) -> list:
+        with self.lock:
+            return list(self.indexes[type].get(self.key(type, fields), []))
+
+    def add(self, type: str, asset: dict):
+        with self.lock:
+            if type in self.indexes:
+                self.indexes[type].setdefault(self.key(type, asset), []).append({
+                    key: asset[key] for key in self.kept_fields if key in asset
+                })
+
+destination_index = DestinationIndex()
+
+# Token bucket shared by every writer thread: at most `rate` POSTs per second
+# on average, with bursts of up to `burst` requests. A rate of 0 disables it.
+class RateLimiter:
+
+    def __init__(self, rate: float = 0, burst: int = 1):
+        self.configure(rate, burst)
+        self.lock = threading.Lock()
+
+    def configure(self, rate: float = 0, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def acquire(self):
+        wait_time = self.take()
+        while wait_time > 0:
+            time.sleep(wait_time)
+            wait_time = self.take()
+
+    def take(self) -> float:
+        # Returns how long to wait before trying again, or 0 when a token was
+        # taken, so the async engine can wait without blocking the loop.
+        if self.rate <= 0:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    async def async_acquire(self):
+        wait_time = self.take()
+        while wait_time > 0:
+            await asyncio.sleep(wait_time)
+            wait_time = self.take()
+
+write_rate_limiter = RateLimiter()
+
+# Append-only JSON lines journal of ported assets: one line per completed
+# source asset with the destination ID it was ported to. Each line is flushed
+# and fsynced as soon as the asset is done, so a crash loses at most the
+# assets that were still in flight.
+class PortingJournal:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'rb+') as file:
+                data = file.read()
+                # Drop a line cut short by a crash before appending again.
+                complete = data.rfind(b"\n") + 1
+                file.truncate(complete)
+            for line in data[:complete].splitlines():
+                entry = json.loads(line)
+                self.entries[(entry['type'], entry['src_id'])] = entry['dst_id']
+        self.file = open(path, 'a')
+
+    def done(self, type: str, src_id: int) -> bool:
+        return (type, src_id) in self.entries
+
+    def dst_id(self, type: str, src_id: int):
+        return self.entries.get((type, src_id))
+
+    def record(self, type: str, src_id: int, dst_id: int):
+        line = json.dumps({'type': type, 'src_id': src_id, 'dst_id': dst_id})
+        with self.lock:
+            self.file.write(f"{line}\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.entries[(type, src_id)] = dst_id
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+journal_options = {
+    "journal": None,
+    "resume": False,
+}
+
+def prefetch_destination_index(types: list):
+
+    referenced_types = set()
+    for type in types:
+        referenced_types.add(type)
+        referenced_types.update(asset_dependencies(type))
+    for type in sorted(referenced_types):
+        if type in baseurls and not destination_index.loaded(type):
+            destination_index.load(dst_tower, type)
+
+def prechecked_assets(type: str, listed_assets):
+
+    # Looks up whether a chunk of listed assets already exists on the
+    # destination by name before handing them out one by one.
+    listed_assets = iter(listed_assets)
+    while True:
+        chunk = list(islice(listed_assets, listing_page_size()))
+        if not chunk:
+            return
+        if not destination_index.loaded(type):
+            destination_index.load_names(dst_tower, type, [ listed_asset['name'] for listed_asset in chunk ])
+        yield from chunk
+
+def find_destination_asset(type: str, **kwargs) -> list:
+
+    if destination_index.loaded(type, kwargs.get('name')):
+        return destination_index.lookup(type, **kwargs)
+    return search_asset(dst_tower, type, **kwargs)
+
 def write_asset(tower: dict, type: str, asset: dict, dry_run: bool = False) -> dict:
 
     baseurl = get_baseurl(tower, type)
     response_data = {}
 
-    print(f"Creating asset of type {type}, name {asset['name']} from {baseurl}")
+    log.info("Creating asset of type %s, name %s from %s", type, asset['name'], baseurl)
     if dry_run:
-        print(f"Dry-run: POST {baseurl} -- {asset}")
+        log.info("Dry-run: POST %s -- %s", baseurl, asset)
     else:
-        response = requests.post(
-            url=baseurl,
-            headers=standard_headers,
-            auth=(tower['usr'], tower['pwd']),
-            verify=tower['verifyssl'],
-            json=asset
-        )
+        write_rate_limiter.acquire()
+        response = tower_request(tower, 'POST', baseurl, json=asset)
         response_data = response.json()
         if response.status_code != 201:
-            print(response_data)
-            # response.raise_for_status()
+            log.error("%s", response_data)
+            raise requests.HTTPError(f"{response.status_code} creating {type} {asset['name']}: {response_data}", response=response)
     
     return response_data
 
@@ -225,11 +981,11 @@ def write_related_assets(type: str, ported_asset: dict, original_asset: dict , d
 
     if type in related_asset_types:
         for related_type in related_asset_types[type]:
-            print(f"related_type : {related_type}")
-            print(f"original_asset['related'][related_type] : {original_asset['related'][related_type]}")
-            related_original_assets = get_asset(tower=src_tower, url=original_asset['related'][related_type])
+            log.debug("related_type : %s", related_type)
+            log.debug("original_asset['related'][related_type] : %s", original_asset['related'][related_type])
+            related_original_assets = get_asset(tower=src_tower, relative_url=original_asset['related'][related_type])
             
-            print(f"related_original_assets: {related_original_assets}")
+            log.debug("related_original_assets: %s", related_original_assets)
             # related_ported_assets = [
             #     (search_asset(tower=dst_tower, type=related_type, **{
             #         key: related_original_asset[key]
@@ -239,72 +995,771 @@ def write_related_assets(type: str, ported_asset: dict, original_asset: dict , d
             # ]
             if type in ['hosts', 'groups']:
                 related_ported_assets = [
-                    (search_asset(tower=dst_tower, type=related_type, name=related_original_asset['name'], inventory=ported_asset['inventory']))[0]
+                    (find_destination_asset(type=related_type, name=related_original_asset['name'], inventory=ported_asset['inventory']))[0]
                     for related_original_asset in related_original_assets['results']
                 ]
             elif type in ['job_templates']:
                 related_ported_assets = [
-                    (search_asset(tower=dst_tower, type=related_type, name=related_original_asset['name'], inventory=ported_asset['inventory']))[0]
+                    (find_destination_asset(type=related_type, name=related_original_asset['name'], inventory=ported_asset['inventory']))[0]
                     for related_original_asset in related_original_assets['results']
                 ]
             else:
                 related_ported_assets = []
-            print(f"related_ported_assets: {related_ported_assets}")
+            log.debug("related_ported_assets: %s", related_ported_assets)
             for related_ported_asset in related_ported_assets:
                 url = f"{dst_tower['url']}{ported_asset['related'][related_type]}"
-                print(f"url: {url}")
+                log.debug("url: %s", url)
                 payload = {'id': related_ported_asset['id']}
-                print(f"Linking to related asset type {related_type} -- {url}")
-                response = requests.post(
-                    url=url,
-                    headers=standard_headers,
-                    auth=(dst_tower['usr'], dst_tower['pwd']),
-                    verify=dst_tower['verifyssl'],
-                    json=payload
-                )
-                print(f"response_content: {response.status_code}")
+                log.debug("Linking to related asset type %s -- %s", related_type, url)
+                write_rate_limiter.acquire()
+                response = tower_request(dst_tower, 'POST', url, json=payload)
+                log.debug("response_content: %s", response.status_code)
                 if response.status_code != 204:
-                    print(f"response_data : {response.json()}")
+                    log.error("response_data : %s", response.json())
                     response.raise_for_status()
 
 
-def port_assets(type: str, limit: int = -1, query: str = None, start_from: int = 0, exclude: str = None, dry_run: bool = False):
+def mapped_asset_names(type: str, asset: dict) -> dict:
+    return {
+        key: asset['summary_fields'][key]['name']
+        for key in keys_to_map[type]
+        if key in asset and key in asset['summary_fields']
+    }
+
+def build_ported_asset(type: str, asset: dict, mapped_ids: dict, credentials_data: dict) -> dict:
+
+    ported_asset = dict()
+    ported_asset.update({
+        key: asset[key]
+        for key in keys_to_keep[type]
+        if key in asset
+    })
+    ported_asset.update(mapped_ids)
+    if type == "credentials":
+        ported_asset.update({
+            "inputs": credentials_data[ported_asset['name']]['inputs'],
+            "organization": 1
+        })
+    return ported_asset
+
+def journaled_ids(type: str, asset: dict) -> dict:
+
+    # Destination IDs of referenced assets already ported by a journaled run.
+    journal = journal_options['journal']
+    if journal is None:
+        return {}
+    return {
+        key: journal.dst_id(key, asset[key])
+        for key in keys_to_map[type]
+        if key in asset and journal.dst_id(key, asset[key]) is not None
+    }
+
+def resolve_ported_asset(type: str, asset: dict, credentials_data: dict) -> dict:
+
+    mapped_ids = journaled_ids(type, asset)
+    mapped_ids.update({
+        key: (find_destination_asset(type=key, name=name))[0]['id']
+        for key, name in mapped_asset_names(type, asset).items()
+        if key not in mapped_ids
+    })
+    return build_ported_asset(type, asset, mapped_ids, credentials_data)
+
+def port_asset(type: str, asset: dict, credentials_data: dict, dry_run: bool = False) -> dict:
+
+    ported_asset = resolve_ported_asset(type, asset, credentials_data)
+    present_assets = find_destination_asset(type, **ported_asset)
+    if len(present_assets) == 0:
+        written_asset = write_asset(tower=dst_tower, type=type, asset=ported_asset, dry_run=dry_run)
+        if 'id' in written_asset:
+            destination_index.add(type, written_asset)
+    else:
+        log.info("Asset %s already exists.", asset['name'])
+        written_asset = present_assets[0]
+
+    # The related links are posted by the same worker, right after the asset
+    # itself exists on the destination.
+    write_related_assets(type=type, ported_asset=written_asset, original_asset=asset, dry_run=dry_run)
+    return written_asset
+
+def load_credentials_data() -> dict:
 
     credentials_data = dict()
     with open('credentials.json', 'r') as file:
         credentials_data = json.load(file)
+    return credentials_data
+
+def record_ported_asset(type: str, listed_asset: dict, written_asset: dict):
+
+    journal = journal_options['journal']
+    if journal is not None and 'id' in written_asset:
+        journal.record(type, listed_asset['id'], written_asset['id'])
 
-    assets = [get_asset(src_tower, asset['url']) for asset in list_asset(tower=src_tower, type=type, start_from=start_from, query=query, limit=limit)]
-    for asset in assets:
-        if exclude is not None and asset['name'] == exclude:
-            print(f"Skipping excluded item {exclude}.")
+def pending_assets(type: str, listed_assets):
+
+    journal = journal_options['journal']
+    for listed_asset in listed_assets:
+        if journal_options['resume'] and journal is not None and journal.done(type, listed_asset['id']):
+            log.info("Skipping %s %s, already ported.", type, listed_asset['name'])
             continue
-        ported_asset = dict()
-        ported_asset.update({
-            key: asset[key]
-            for key in keys_to_keep[type]
-            if key in asset
-        })
-        ported_asset.update({
-            key: (search_asset(tower=dst_tower, type=key, name=asset['summary_fields'][key]['name']))[0]['id']
-            for key in keys_to_map[type]
-            if key in asset and key in asset['summary_fields']
-        })
-        if type == "credentials":
-            ported_asset.update({
-                "inputs": credentials_data[ported_asset['name']]['inputs'],
-                "organization": 1
-            })
-        present_assets = search_asset(dst_tower, type, **ported_asset)
-        if len(present_assets) == 0:
-            written_asset = write_asset(tower=dst_tower, type=type, asset=ported_asset, dry_run=dry_run)
+        yield listed_asset
+
+def report_failures(type: str, failures: list):
+
+    if failures:
+        log.error("%s %s assets failed:", len(failures), type)
+        for name, error in failures:
+            log.error("  %s: %s", name, error)
+
+bulk_options = {
+    "enabled": True,
+    "batch_size": 100,
+}
+
+# Fields accepted per host by /api/v2/bulk/host_create/.
+bulk_host_fields = ['name', 'description', 'enabled', 'instance_id', 'variables']
+
+bulk_endpoints = {}
+
+def record_bulk_endpoints(tower: dict, response) -> dict:
+
+    # AWX 22.1 and later list their bulk operations here, older versions 404.
+    bulk_endpoints[tower['url']] = response.json() if response.status_code == 200 else {}
+    log.info("Bulk API on %s: %s", tower['url'], ', '.join(bulk_endpoints[tower['url']]) or 'not available')
+    return bulk_endpoints[tower['url']]
+
+def get_bulk_endpoints(tower: dict) -> dict:
+
+    if tower['url'] not in bulk_endpoints:
+        record_bulk_endpoints(tower, tower_request(tower, 'GET', f"{tower['url']}/api/v2/bulk/"))
+    return bulk_endpoints[tower['url']]
+
+def bulk_created_hosts(inventory: int, response_data: dict) -> list:
+
+    # The bulk response leaves out the inventory and related links that the
+    # group associations need.
+    return [
+        {**host, 'inventory': inventory, 'related': {'groups': f"{host['url']}groups/"}}
+        for host in response_data['hosts']
+    ]
+
+def bulk_host_payload(batch: list) -> list:
+    return [
+        { key: ported_asset[key] for key in bulk_host_fields if key in ported_asset }
+        for listed_asset, asset, ported_asset in batch
+    ]
+
+def bulk_host_create(inventory: int, hosts: list, dry_run: bool = False) -> list:
+
+    url = f"{dst_tower['url']}{get_bulk_endpoints(dst_tower)['host_create']}"
+    payload = {'inventory': inventory, 'hosts': hosts}
+    log.info("Creating %s hosts in inventory %s with one bulk request", len(hosts), inventory)
+    if dry_run:
+        log.info("Dry-run: POST %s -- %s", url, payload)
+        return []
+    write_rate_limiter.acquire()
+    response = tower_request(dst_tower, 'POST', url, json=payload)
+    response_data = response.json()
+    if response.status_code != 201:
+        raise requests.HTTPError(f"{response.status_code} creating {len(hosts)} hosts in bulk: {response_data}", response=response)
+    return bulk_created_hosts(inventory, response_data)
+
+def port_hosts_in_bulk(listed_assets, credentials_data: dict, dry_run: bool = False) -> list:
+
+    # Hosts are resolved against the destination by the writer pool, then the
+    # new ones are created with one bulk request per batch of an inventory.
+    # Group memberships have no bulk endpoint: they are posted by the writer
+    # pool once their batch exists. A batch the destination rejects is ported
+    # one host at a time, since bulk creation is all or nothing.
+    workers = writer_options['workers']
+    failures = []
+    batches = {}
+    created = []
+
+    def resolve(listed_asset: dict):
+        try:
+            asset = get_asset(src_tower, listed_asset['url'], modified=listed_asset.get('modified'))
+            ported_asset = resolve_ported_asset('hosts', asset, credentials_data)
+            return listed_asset, asset, ported_asset, find_destination_asset('hosts', **ported_asset)
+        except Exception as e:
+            log.error("Failed porting hosts %s: %s", listed_asset['name'], e)
+            failures.append((listed_asset['name'], e))
+            return None
+
+    def link(entry: tuple):
+        listed_asset, asset, written_asset = entry
+        try:
+            write_related_assets(type='hosts', ported_asset=written_asset, original_asset=asset, dry_run=dry_run)
+            record_ported_asset('hosts', listed_asset, written_asset)
+        except Exception as e:
+            log.error("Failed porting hosts %s: %s", listed_asset['name'], e)
+            return (listed_asset['name'], e)
+        return None
+
+    def port_one(entry: tuple):
+        listed_asset, asset, ported_asset = entry
+        try:
+            record_ported_asset('hosts', listed_asset, port_asset('hosts', asset, credentials_data, dry_run=dry_run))
+        except Exception as e:
+            log.error("Failed porting hosts %s: %s", listed_asset['name'], e)
+            return (listed_asset['name'], e)
+        return None
+
+    def flush_links():
+        failures.extend(failure for failure in unordered_map(link, created, workers) if failure is not None)
+        created.clear()
+
+    def flush(inventory: int):
+        batch = batches.pop(inventory)
+        try:
+            written_assets = { host['name']: host for host in bulk_host_create(inventory, bulk_host_payload(batch), dry_run=dry_run) }
+        except Exception as e:
+            log.warning("Bulk creation of %s hosts in inventory %s failed, porting them one by one: %s", len(batch), inventory, e)
+            failures.extend(failure for failure in unordered_map(port_one, batch, workers) if failure is not None)
+            return
+        for listed_asset, asset, ported_asset in batch:
+            if ported_asset['name'] in written_assets:
+                destination_index.add('hosts', written_assets[ported_asset['name']])
+                created.append((listed_asset, asset, written_assets[ported_asset['name']]))
+        flush_links()
+
+    for resolved in unordered_map(resolve, listed_assets, workers):
+        if resolved is None:
+            continue
+        listed_asset, asset, ported_asset, present_assets = resolved
+        if present_assets:
+            log.info("Asset %s already exists.", asset['name'])
+            created.append((listed_asset, asset, present_assets[0]))
+            if len(created) >= bulk_options['batch_size']:
+                flush_links()
+            continue
+        batches.setdefault(ported_asset['inventory'], []).append((listed_asset, asset, ported_asset))
+        if len(batches[ported_asset['inventory']]) >= bulk_options['batch_size']:
+            flush(ported_asset['inventory'])
+    for inventory in list(batches):
+        flush(inventory)
+    flush_links()
+    return failures
+
+# All port_assets needs from a listing, the rest comes from get_asset.
+listed_fields = ['id', 'name', 'url', 'modified']
+
+def port_assets(type: str, limit: int = -1, query: str = None, start_from: int = 0, exclude: str = None, dry_run: bool = False) -> list:
+
+    credentials_data = load_credentials_data()
+
+    def port_listed_asset(listed_asset: dict):
+        try:
+            asset = get_asset(src_tower, listed_asset['url'], modified=listed_asset.get('modified'))
+            written_asset = port_asset(type, asset, credentials_data, dry_run=dry_run)
+            record_ported_asset(type, listed_asset, written_asset)
+        except Exception as e:
+            log.error("Failed porting %s %s: %s", type, listed_asset['name'], e)
+            return (listed_asset['name'], e)
+        return None
+
+    if exclude is not None:
+        query = join_query(query, f"not__name={quote(exclude)}")
+    listed_assets = pending_assets(type, iter_asset(tower=src_tower, type=type, start_from=start_from, query=query, limit=limit, fields=listed_fields))
+    listed_assets = prechecked_assets(type, listed_assets)
+
+    if type == 'hosts' and bulk_options['enabled'] and 'host_create' in get_bulk_endpoints(dst_tower):
+        failures = port_hosts_in_bulk(listed_assets, credentials_data, dry_run=dry_run)
+    else:
+        failures = [
+            failure
+            for failure in unordered_map(port_listed_asset, listed_assets, writer_options['workers'])
+            if failure is not None
+        ]
+    report_failures(type, failures)
+    return failures
+
+def portable_asset_types() -> list:
+    return [ type for type in baseurls if type in keys_to_keep and type in keys_to_map ]
+
+def asset_dependencies(type: str) -> set:
+    return {
+        dependency
+        for dependency in keys_to_map.get(type, []) + related_asset_types.get(type, []) + extra_asset_dependencies.get(type, [])
+        if dependency in baseurls and dependency != type
+    }
+
+def ready_asset_types(types: list, dependencies: dict, done: set, failed: dict, running) -> list:
+    return [
+        type
+        for type in types
+        if type not in done and type not in failed and type not in running and dependencies[type] <= done
+    ]
+
+def record_asset_type_result(type: str, future, done: set, failed: dict):
+
+    try:
+        failures = future.result()
+        done.add(type)
+        log.info("Asset type %s done, %s failed items.", type, len(failures))
+    except Exception as e:
+        failed[type] = e
+        log.error("Asset type %s failed: %s", type, e)
+
+def report_skipped_asset_types(types: list, dependencies: dict, done: set, failed: dict):
+
+    for type in types:
+        if type not in done and type not in failed:
+            log.warning("Asset type %s skipped, a dependency failed: %s", type, sorted(dependencies[type] - done))
+
+def port_all_assets(types: list, workers: int = 4, limit: int = -1, exclude: str = None, dry_run: bool = False):
+
+    # Dependencies outside the selected types are assumed to be ported already.
+    dependencies = { type: asset_dependencies(type) & set(types) for type in types }
+    done = set()
+    failed = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            for type in ready_asset_types(types, dependencies, done, failed, running.values()):
+                log.info("Scheduling asset type %s", type)
+                future = executor.submit(port_assets, type=type, limit=limit, exclude=exclude, dry_run=dry_run)
+                running[future] = type
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record_asset_type_result(running.pop(future), future, done, failed)
+
+    report_skipped_asset_types(types, dependencies, done, failed)
+    return done, failed
+
+# Async engine: the same listing, lookup and write steps on top of httpx, with
+# one client per tower and a single semaphore bounding the requests in flight.
+
+async_clients = {}
+async_semaphore = None
+
+def run_async(coroutine_function, *args, **kwargs):
+
+    if httpx is None:
+        raise RuntimeError("The async engine requires the httpx package.")
+
+    async def runner():
+        global async_semaphore
+        async_semaphore = asyncio.Semaphore(async_options['concurrency'])
+        try:
+            return await coroutine_function(*args, **kwargs)
+        finally:
+            for client in async_clients.values():
+                await client.aclose()
+            async_clients.clear()
+
+    return asyncio.run(runner())
+
+def get_async_client(tower: dict):
+
+    if tower['url'] not in async_clients:
+        pool_size = tower.get('pool_size', 10)
+        headers = dict(standard_headers)
+        if not tower.get('keepalive', True):
+            headers.update({'Connection': 'close'})
+        async_clients[tower['url']] = httpx.AsyncClient(
+            auth=(tower['usr'], tower['pwd']),
+            verify=tower['verifyssl'],
+            headers=headers,
+            timeout=tower.get('timeout', 30),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+    return async_clients[tower['url']]
+
+async def async_tower_request(tower: dict, method: str, url: str, **kwargs):
+
+    client = get_async_client(tower)
+    retries = tower.get('retries', 3)
+    backoff_factor = tower.get('backoff_factor', 0.5)
+
+    for attempt in range(retries + 1):
+        async with async_semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                request_metrics.record(method, url, time.perf_counter() - start, len(response.content), error=response.status_code >= 400)
+            except httpx.TransportError as e:
+                request_metrics.record(method, url, time.perf_counter() - start, error=True)
+                # A read error can arrive after the server already handled a
+                # POST, so like urllib3, methods other than GET are retried
+                # only when the connection itself failed.
+                if attempt == retries or (method != 'GET' and not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))):
+                    raise
+                response = None
+        # Only idempotent requests are retried on 429/5xx, like the sync session.
+        if response is not None and (response.status_code not in retry_status_codes or method != 'GET' or attempt == retries):
+            return response
+        await asyncio.sleep(backoff_factor * (2 ** attempt))
+
+def raise_for_async_status(response):
+
+    if response.status_code >= 400:
+        raise requests.HTTPError(f"{response.status_code} for url {response.url}: {response.text}")
+
+async def async_fetch_page(tower: dict, type: str, url: str) -> dict:
+
+    log.debug("Listing assets of type %s from %s", type, url)
+    response = await async_tower_request(tower, 'GET', url)
+    raise_for_async_status(response)
+    return response.json()
+
+async def async_iter_asset_pages(tower: dict, type: str, query: str = None, start_from: int = 0, limit: int = -1, fields: list = None):
+
+    page_size = listing_page_size()
+    baseurl = f"{get_baseurl(tower, type)}?page_size={page_size}"
+    if query is not None:
+        baseurl = f"{baseurl}&{query}"
+    first_page = start_from // page_size + 1
+
+    log.debug("Listing assets of type %s from %s&page=%s", type, baseurl, first_page)
+    response = await async_tower_request(tower, 'GET', f"{baseurl}&page={first_page}")
+    if response.status_code == 404:
+        return
+    raise_for_async_status(response)
+    response_data = trim_page(response.json(), fields)
+    check_page_size(response_data, page_size, baseurl)
+
+    end = response_data['count'] if limit <= 0 else min(response_data['count'], start_from + limit)
+    if end <= start_from:
+        return
+
+    def window(results: list, page: int) -> list:
+        position = (page - 1) * page_size
+        return results[max(0, start_from - position):max(0, end - position)]
+
+    yield window(response_data['results'], first_page)
+
+    # Fetch the remaining pages in batches so only a bounded number of pages
+    # is held in memory at a time.
+    last_page = (end - 1) // page_size + 1
+    batch_size = max(listing_options['concurrency'], 1)
+    for batch_start in range(first_page + 1, last_page + 1, batch_size):
+        pages = range(batch_start, min(batch_start + batch_size, last_page + 1))
+        pages_data = await asyncio.gather(*(
+            async_fetch_page(tower, type, f"{baseurl}&page={page}")
+            for page in pages
+        ))
+        for page, page_data in zip(pages, pages_data):
+            yield window(trim_page(page_data, fields)['results'], page)
+
+async def async_list_asset(tower: dict, type: str, query: str = None, start_from: int = 0, limit: int = -1, fields: list = None) -> list:
+
+    asset_list = []
+    async for assets in async_iter_asset_pages(tower, type, query=query, start_from=start_from, limit=limit, fields=fields):
+        asset_list.extend(assets)
+    return asset_list
+
+async def async_get_asset(tower: dict, relative_url: str = None, modified: str = None) -> dict:
+
+    url = f"{tower['url']}{relative_url}"
+    cached_asset = asset_cache.get(tower, url)
+    if cached_asset is not None:
+        log.debug("Getting asset from cached %s", url)
+        request_metrics.cache(url, hit=True)
+        return cached_asset
+    return await in_flight_requests.async_do(url, lambda: async_load_asset(tower, url, modified))
+
+async def async_load_asset(tower: dict, url: str, modified: str = None) -> dict:
+
+    asset = {}
+    disk_cache = disk_caches.get(tower['url'])
+
+    cached = disk_cache.get(url, modified) if disk_cache is not None else None
+    request_metrics.cache(url, hit=cached is not None)
+    if cached is not None:
+        log.debug("Getting asset from disk cache %s", url)
+        cached_asset, size = cached
+        asset_cache.put(tower, url, cached_asset, size)
+        return cached_asset
+
+    page_url = url
+    size = 0
+    while True:
+        log.debug("Getting asset from %s", page_url)
+        response = await async_tower_request(tower, 'GET', page_url)
+        raise_for_async_status(response)
+        response_data = response.json()
+        size += len(response.content)
+
+        if 'results' in asset:
+            asset['results'].extend(response_data['results'])
+        else:
+            asset = response_data
+
+        if 'next' in response_data and response_data['next'] is not None:
+            page_url = f"{tower['url']}{response_data['next']}"
         else:
-            print(f"Asset {asset['name']} already exists.")
-            written_asset = present_assets[0]
+            break
+
+    asset_cache.put(tower, url, asset, size)
+    if disk_cache is not None:
+        disk_cache.put(url, asset, modified)
+    return asset
+
+async def async_search_asset(tower: dict, type: str, **kwargs : dict) -> list:
+
+    query = "&".join([
+        f"{k}={quote(str(v))}"
+        for k,v in kwargs.items()
+        if k not in keys_not_to_search_for
+    ])
+
+    url = f"{get_baseurl(tower, type)}?{query}"
+    cached_results = asset_cache.get(tower, url)
+    if cached_results is not None:
+        log.debug("Searching cached asset type %s url %s", type, url)
+        request_metrics.cache(url, hit=True)
+        return cached_results
+    return await in_flight_requests.async_do(url, lambda: async_load_search_results(tower, type, url))
+
+async def async_load_search_results(tower: dict, type: str, url: str) -> list:
+
+    log.debug("Searching asset type %s url %s", type, url)
+    request_metrics.cache(url, hit=False)
+    response = await async_tower_request(tower, 'GET', url)
+    response_data = response.json()
+    if response.status_code != 200:
+        log.error("%s", response_data)
+        raise_for_async_status(response)
+    results = trim_page(response_data, DestinationIndex.kept_fields)['results']
+    if results:
+        asset_cache.put(tower, url, results, len(response.content))
+    return results
+
+async def async_load_destination_names(type: str, names: list):
+
+    for chunk, query in destination_index.name_queries(type, names):
+        assets = await async_list_asset(dst_tower, type, query=query, fields=DestinationIndex.kept_fields)
+        destination_index.index_names(type, chunk, assets)
+
+async def async_find_destination_asset(type: str, **kwargs) -> list:
+
+    if destination_index.loaded(type, kwargs.get('name')):
+        return destination_index.lookup(type, **kwargs)
+    return await async_search_asset(dst_tower, type, **kwargs)
+
+async def async_write_asset(tower: dict, type: str, asset: dict, dry_run: bool = False) -> dict:
+
+    baseurl = get_baseurl(tower, type)
+    response_data = {}
+
+    log.info("Creating asset of type %s, name %s from %s", type, asset['name'], baseurl)
+    if dry_run:
+        log.info("Dry-run: POST %s -- %s", baseurl, asset)
+    else:
+        await write_rate_limiter.async_acquire()
+        response = await async_tower_request(tower, 'POST', baseurl, json=asset)
+        response_data = response.json()
+        if response.status_code != 201:
+            log.error("%s", response_data)
+            raise requests.HTTPError(f"{response.status_code} creating {type} {asset['name']}: {response_data}")
+
+    return response_data
 
-        # print(f"asset : {asset}")
-        # print(f"written_asset : {written_asset}")
-        write_related_assets(type=type, ported_asset=written_asset, original_asset=asset, dry_run=dry_run)
+async def async_write_related_assets(type: str, ported_asset: dict, original_asset: dict, dry_run: bool = False):
+
+    # Same links as write_related_assets: only hosts and groups are linked to
+    # their related assets, looked up by name in the ported inventory.
+    if type not in related_asset_types or type not in ['hosts', 'groups']:
+        return
+
+    for related_type in related_asset_types[type]:
+        related_original_assets = await async_get_asset(src_tower, original_asset['related'][related_type])
+        related_ported_assets = await asyncio.gather(*(
+            async_find_destination_asset(type=related_type, name=related_original_asset['name'], inventory=ported_asset['inventory'])
+            for related_original_asset in related_original_assets['results']
+        ))
+        url = f"{dst_tower['url']}{ported_asset['related'][related_type]}"
+
+        async def link(related_ported_asset: dict):
+            log.debug("Linking to related asset type %s -- %s", related_type, url)
+            await write_rate_limiter.async_acquire()
+            response = await async_tower_request(dst_tower, 'POST', url, json={'id': related_ported_asset['id']})
+            if response.status_code != 204:
+                log.error("response_data : %s", response.json())
+                raise_for_async_status(response)
+
+        await asyncio.gather(*(link(related_ported_asset[0]) for related_ported_asset in related_ported_assets))
+
+async def async_resolve_ported_asset(type: str, asset: dict, credentials_data: dict) -> dict:
+
+    mapped_ids = journaled_ids(type, asset)
+    mapped_names = { key: name for key, name in mapped_asset_names(type, asset).items() if key not in mapped_ids }
+    mapped_assets = await asyncio.gather(*(
+        async_find_destination_asset(type=key, name=name)
+        for key, name in mapped_names.items()
+    ))
+    mapped_ids.update({ key: found[0]['id'] for key, found in zip(mapped_names, mapped_assets) })
+    return build_ported_asset(type, asset, mapped_ids, credentials_data)
+
+async def async_port_asset(type: str, asset: dict, credentials_data: dict, dry_run: bool = False) -> dict:
+
+    ported_asset = await async_resolve_ported_asset(type, asset, credentials_data)
+
+    present_assets = await async_find_destination_asset(type, **ported_asset)
+    if len(present_assets) == 0:
+        written_asset = await async_write_asset(tower=dst_tower, type=type, asset=ported_asset, dry_run=dry_run)
+        if 'id' in written_asset:
+            destination_index.add(type, written_asset)
+    else:
+        log.info("Asset %s already exists.", asset['name'])
+        written_asset = present_assets[0]
+
+    await async_write_related_assets(type=type, ported_asset=written_asset, original_asset=asset, dry_run=dry_run)
+    return written_asset
+
+async def async_get_bulk_endpoints(tower: dict) -> dict:
+
+    if tower['url'] not in bulk_endpoints:
+        record_bulk_endpoints(tower, await async_tower_request(tower, 'GET', f"{tower['url']}/api/v2/bulk/"))
+    return bulk_endpoints[tower['url']]
+
+async def async_bulk_host_create(inventory: int, hosts: list, dry_run: bool = False) -> list:
+
+    url = f"{dst_tower['url']}{(await async_get_bulk_endpoints(dst_tower))['host_create']}"
+    payload = {'inventory': inventory, 'hosts': hosts}
+    log.info("Creating %s hosts in inventory %s with one bulk request", len(hosts), inventory)
+    if dry_run:
+        log.info("Dry-run: POST %s -- %s", url, payload)
+        return []
+    await write_rate_limiter.async_acquire()
+    response = await async_tower_request(dst_tower, 'POST', url, json=payload)
+    response_data = response.json()
+    if response.status_code != 201:
+        raise requests.HTTPError(f"{response.status_code} creating {len(hosts)} hosts in bulk: {response_data}")
+    return bulk_created_hosts(inventory, response_data)
+
+async def async_port_hosts_in_bulk(pages, credentials_data: dict, dry_run: bool = False) -> list:
+
+    # Same stages as port_hosts_in_bulk: each page is resolved concurrently,
+    # new hosts are created per batch of an inventory, and the group links
+    # of a batch are posted once it exists.
+    failures = []
+    batches = {}
+
+    async def resolve(listed_asset: dict):
+        try:
+            asset = await async_get_asset(src_tower, listed_asset['url'], modified=listed_asset.get('modified'))
+            ported_asset = await async_resolve_ported_asset('hosts', asset, credentials_data)
+            return listed_asset, asset, ported_asset, await async_find_destination_asset('hosts', **ported_asset)
+        except Exception as e:
+            log.error("Failed porting hosts %s: %s", listed_asset['name'], e)
+            failures.append((listed_asset['name'], e))
+            return None
+
+    async def link(listed_asset: dict, asset: dict, written_asset: dict):
+        try:
+            await async_write_related_assets(type='hosts', ported_asset=written_asset, original_asset=asset, dry_run=dry_run)
+            record_ported_asset('hosts', listed_asset, written_asset)
+        except Exception as e:
+            log.error("Failed porting hosts %s: %s", listed_asset['name'], e)
+            return (listed_asset['name'], e)
+        return None
+
+    async def port_one(listed_asset: dict, asset: dict, ported_asset: dict):
+        try:
+            record_ported_asset('hosts', listed_asset, await async_port_asset('hosts', asset, credentials_data, dry_run=dry_run))
+        except Exception as e:
+            log.error("Failed porting hosts %s: %s", listed_asset['name'], e)
+            return (listed_asset['name'], e)
+        return None
+
+    async def flush(inventory: int):
+        batch = batches.pop(inventory)
+        try:
+            written_assets = { host['name']: host for host in await async_bulk_host_create(inventory, bulk_host_payload(batch), dry_run=dry_run) }
+        except Exception as e:
+            log.warning("Bulk creation of %s hosts in inventory %s failed, porting them one by one: %s", len(batch), inventory, e)
+            results = await asyncio.gather(*(port_one(*entry) for entry in batch))
+        else:
+            created = [ entry for entry in batch if entry[2]['name'] in written_assets ]
+            for listed_asset, asset, ported_asset in created:
+                destination_index.add('hosts', written_assets[ported_asset['name']])
+            results = await asyncio.gather(*(
+                link(listed_asset, asset, written_assets[ported_asset['name']])
+                for listed_asset, asset, ported_asset in created
+            ))
+        failures.extend(failure for failure in results if failure is not None)
+
+    async for listed_assets in pages:
+        existing = []
+        for resolved in await asyncio.gather(*(resolve(listed_asset) for listed_asset in listed_assets)):
+            if resolved is None:
+                continue
+            listed_asset, asset, ported_asset, present_assets = resolved
+            if present_assets:
+                log.info("Asset %s already exists.", asset['name'])
+                existing.append(link(listed_asset, asset, present_assets[0]))
+            else:
+                batches.setdefault(ported_asset['inventory'], []).append((listed_asset, asset, ported_asset))
+        results = await asyncio.gather(*existing)
+        failures.extend(failure for failure in results if failure is not None)
+        for inventory in [ inventory for inventory, batch in batches.items() if len(batch) >= bulk_options['batch_size'] ]:
+            await flush(inventory)
+    for inventory in list(batches):
+        await flush(inventory)
+    return failures
+
+async def async_port_assets(type: str, limit: int = -1, query: str = None, start_from: int = 0, exclude: str = None, dry_run: bool = False) -> list:
+
+    credentials_data = load_credentials_data()
+
+    async def port_listed_asset(listed_asset: dict):
+        try:
+            asset = await async_get_asset(src_tower, listed_asset['url'], modified=listed_asset.get('modified'))
+            written_asset = await async_port_asset(type, asset, credentials_data, dry_run=dry_run)
+            record_ported_asset(type, listed_asset, written_asset)
+        except Exception as e:
+            log.error("Failed porting %s %s: %s", type, listed_asset['name'], e)
+            return (listed_asset['name'], e)
+        return None
+
+    if exclude is not None:
+        query = join_query(query, f"not__name={quote(exclude)}")
+
+    async def listed_pages():
+        async for listed_assets in async_iter_asset_pages(src_tower, type, query=query, start_from=start_from, limit=limit, fields=listed_fields):
+            listed_assets = list(pending_assets(type, listed_assets))
+            if not destination_index.loaded(type):
+                await async_load_destination_names(type, [ listed_asset['name'] for listed_asset in listed_assets ])
+            yield listed_assets
+
+    if type == 'hosts' and bulk_options['enabled'] and 'host_create' in await async_get_bulk_endpoints(dst_tower):
+        failures = await async_port_hosts_in_bulk(listed_pages(), credentials_data, dry_run=dry_run)
+    else:
+        failures = []
+        async for listed_assets in listed_pages():
+            results = await asyncio.gather(*(
+                port_listed_asset(listed_asset)
+                for listed_asset in listed_assets
+            ))
+            failures.extend(failure for failure in results if failure is not None)
+
+    report_failures(type, failures)
+    return failures
+
+async def async_port_all_assets(types: list, limit: int = -1, exclude: str = None, dry_run: bool = False):
+
+    dependencies = { type: asset_dependencies(type) & set(types) for type in types }
+    done = set()
+    failed = {}
+    running = {}
+
+    while True:
+        for type in ready_asset_types(types, dependencies, done, failed, running.values()):
+            log.info("Scheduling asset type %s", type)
+            task = asyncio.ensure_future(async_port_assets(type=type, limit=limit, exclude=exclude, dry_run=dry_run))
+            running[task] = type
+        if not running:
+            break
+        finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            record_asset_type_result(running.pop(task), task, done, failed)
+
+    report_skipped_asset_types(types, dependencies, done, failed)
+    return done, failed
 
 def main():
 
@@ -319,7 +1774,24 @@ def main():
     parser.add_argument('-q', '--query', type=str, action='store', help='Search query')
     parser.add_argument('-x', '--exclude', type=str, action='store', help='Exclude item name from porting')
     parser.add_argument('-s', '--start-from', type=int, action='store', help='Start from item number')
+    parser.add_argument('--cache-dir', type=str, action='store', help='Persistent source tower response cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the persistent response cache')
+    parser.add_argument('-a', '--all', action='store_true', help='Port every asset type, in dependency order')
+    parser.add_argument('-T', '--types', type=str, action='store', help='Comma separated item types to port, in dependency order')
+    parser.add_argument('--type-workers', type=int, action='store', default=4, help='Number of independent item types ported in parallel')
+    parser.add_argument('-w', '--workers', type=int, action='store', help='Number of items written concurrently')
+    parser.add_argument('-r', '--rate', type=float, action='store', help='Maximum write requests per second to the destination, 0 for unlimited')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Use the asyncio/httpx engine instead of blocking requests')
+    parser.add_argument('--async-concurrency', type=int, action='store', help='Maximum requests in flight with --async')
+    parser.add_argument('-j', '--journal', type=str, action='store', help='Journal file recording the source and destination IDs of ported items')
+    parser.add_argument('-R', '--resume', action='store_true', help='Skip items already recorded in the journal')
+    parser.add_argument('--log-level', type=str, action='store', default='INFO', help='Logging level, DEBUG shows every request')
+    parser.add_argument('--metrics-file', type=str, action='store', help='Write request metrics as JSON, or Prometheus textfile format if the name ends in .prom')
+    parser.add_argument('--no-bulk', action='store_true', help='Create hosts one by one even when the destination has the bulk API')
+    parser.add_argument('-p', '--prefetch', action='store_true', help='Index the referenced destination item types once instead of searching per item')
     args = parser.parse_args()
+    if (args.all or args.types) and (args.query is not None or args.start_from is not None):
+        parser.error("--query and --start-from apply to a single --asset-type and cannot be combined with --all or --types")
     dry_run = args.dry_run
     asset_type = args.asset_type
     limit = args.limit
@@ -327,6 +1799,7 @@ def main():
     query = args.query
     exclude = args.exclude
     start_from = args.start_from or 0
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
 
     config_data = dict()
     with open(config_file, 'r') as file:
@@ -339,11 +1812,64 @@ def main():
             standard_headers.update(config_data['standard_headers'])
         if 'baseurls' in config_data:
             baseurls.update(config_data['baseurls'])
+        if 'listing' in config_data:
+            listing_options.update(config_data['listing'])
+        if 'disk_cache' in config_data:
+            disk_cache_options.update(config_data['disk_cache'])
+        if 'asset_cache' in config_data:
+            asset_cache.resize(**config_data['asset_cache'])
+        if 'writer' in config_data:
+            writer_options.update(config_data['writer'])
+        if 'async' in config_data:
+            async_options.update(config_data['async'])
+        if 'bulk' in config_data:
+            bulk_options.update(config_data['bulk'])
+
+    if args.no_bulk:
+        bulk_options['enabled'] = False
+    if args.workers is not None:
+        writer_options['workers'] = args.workers
+    if args.rate is not None:
+        writer_options['rate'] = args.rate
+    write_rate_limiter.configure(writer_options['rate'], writer_options['burst'])
+    if args.async_concurrency is not None:
+        async_options['concurrency'] = args.async_concurrency
+    if args.journal or args.resume:
+        journal_options['journal'] = PortingJournal(args.journal or './awx-porting.journal')
+        journal_options['resume'] = args.resume
 
     requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
     valid_asset_types = baseurls.keys()
-    if asset_type in valid_asset_types:
-        port_assets(type=asset_type, limit=limit, query=query, start_from=start_from, exclude=exclude, dry_run=dry_run)
+    asset_types = portable_asset_types() if args.all else args.types.split(',') if args.types else None
+    if asset_types is not None and set(asset_types) <= set(portable_asset_types()):
+        configure_disk_cache(src_tower, cache_dir=args.cache_dir, no_cache=args.no_cache)
+        try:
+            if args.prefetch:
+                prefetch_destination_index(asset_types)
+            if args.use_async:
+                run_async(async_port_all_assets, types=asset_types, limit=limit, exclude=exclude, dry_run=dry_run)
+            else:
+                port_all_assets(types=asset_types, workers=args.type_workers, limit=limit, exclude=exclude, dry_run=dry_run)
+        finally:
+            report_run(args.metrics_file)
+            if journal_options['journal'] is not None:
+                journal_options['journal'].close()
+    elif asset_types is not None:
+        print(f"Asset types {asset_types} are not all valid. Valid types are : {portable_asset_types()}")
+        parser.print_help()
+    elif asset_type in valid_asset_types:
+        configure_disk_cache(src_tower, cache_dir=args.cache_dir, no_cache=args.no_cache)
+        try:
+            if args.prefetch:
+                prefetch_destination_index([asset_type])
+            if args.use_async:
+                run_async(async_port_assets, type=asset_type, limit=limit, query=query, start_from=start_from, exclude=exclude, dry_run=dry_run)
+            else:
+                port_assets(type=asset_type, limit=limit, query=query, start_from=start_from, exclude=exclude, dry_run=dry_run)
+        finally:
+            report_run(args.metrics_file)
+            if journal_options['journal'] is not None:
+                journal_options['journal'].close()
     else:
         print(f"Asset type {asset_type} is not valid. Valid types are : {valid_asset_types}")
         parser.print_help()
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+
+import argparse
+import importlib.util
+import os
+import time
+import requests
+
+from fake_awx import FakeAWX, seed, start_server
+
+spec = importlib.util.spec_from_file_location(
+    'awx_porting', os.path.join(os.path.dirname(__file__), '..', 'awx-porting.py')
+)
+awx_porting = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(awx_porting)
+
+
+def bench(label: str, count: int, fetch) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        fetch()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {count:>6} requests in {elapsed:7.3f}s -- {count / elapsed:8.1f} req/s")
+    return elapsed
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        prog='bench_session.py',
+        description='Compares bare requests calls to the pooled tower session against a local fake AWX.'
+    )
+    parser.add_argument('-r', '--requests', type=int, action='store', default=2000, help='Number of requests per run')
+    parser.add_argument('-H', '--hosts', type=int, action='store', default=200, help='Number of hosts served by the fake AWX')
+    args = parser.parse_args()
+
+    fake = seed(FakeAWX(), hosts=args.hosts)
+    server = start_server(fake)
+    tower = {'url': f"http://127.0.0.1:{server.server_port}", 'usr': 'admin', 'pwd': 'secret', 'verifyssl': False}
+    url = f"{tower['url']}/api/v2/hosts/1/"
+
+    before = bench('requests.get', args.requests, lambda: requests.get(
+        url=url,
+        headers=awx_porting.standard_headers,
+        auth=(tower['usr'], tower['pwd']),
+        verify=tower['verifyssl']
+    ).json())
+    after = bench('tower_request', args.requests, lambda: awx_porting.tower_request(tower, 'GET', url).json())
+    print(f"speedup: {before / after:.2f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
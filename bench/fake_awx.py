@@ -0,0 +1,388 @@
+#!/usr/bin/python3
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+max_page_size = 200
+default_page_size = 25
+bulk_host_max_create = 100
+
+collection_types = [
+    'organizations', 'projects', 'credentials', 'inventories', 'inventory_sources', 'groups', 'hosts',
+    'job_templates', 'workflow_job_templates', 'workflow_job_template_nodes',
+]
+
+related_links = {
+    'inventories': ['hosts', 'groups', 'script'],
+    'groups': ['hosts', 'all_hosts', 'children'],
+    'hosts': ['groups', 'all_groups'],
+    'job_templates': ['survey_spec', 'credentials'],
+    'workflow_job_templates': ['survey_spec', 'workflow_nodes'],
+    'workflow_job_template_nodes': ['success_nodes', 'failure_nodes', 'always_nodes'],
+}
+
+
+def timestamp(seconds: int) -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000000Z', time.gmtime(1700000000 + seconds))
+
+
+# One AWX collection with the indexes the fake needs to answer name and
+# inventory filters without scanning every object.
+class Collection:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.objects = OrderedDict()
+        self.by_name = {}
+        self.by_inventory = {}
+        self.next_id = 1
+
+    def add(self, obj: dict) -> dict:
+        obj.setdefault('id', self.next_id)
+        self.next_id = max(self.next_id, obj['id'] + 1)
+        obj['url'] = f"/api/v2/{self.name}/{obj['id']}/"
+        obj['related'] = {link: f"{obj['url']}{link}/" for link in related_links.get(self.name, [])}
+        obj.setdefault('modified', timestamp(obj['id']))
+        self.objects[obj['id']] = obj
+        self.by_name.setdefault(obj['name'], []).append(obj)
+        if obj.get('inventory') is not None:
+            self.by_inventory.setdefault(obj['inventory'], []).append(obj)
+        return obj
+
+    def candidates(self, filters: list) -> list:
+        for key, value in filters:
+            if key == 'name':
+                return self.by_name.get(value, [])
+            if key == 'inventory' and value.isdigit():
+                return self.by_inventory.get(int(value), [])
+        return list(self.objects.values())
+
+
+def matches(obj: dict, key: str, value: str) -> bool:
+    negate = key.startswith('not__')
+    if negate:
+        key = key[len('not__'):]
+    field, _, lookup = key.partition('__')
+    actual = obj.get(field)
+    if lookup == 'in':
+        result = str(actual) in value.split(',')
+    elif lookup == 'gt':
+        result = actual is not None and str(actual) > value
+    else:
+        result = str(actual) == value or (isinstance(actual, bool) and str(actual).lower() == value.lower())
+    return result != negate
+
+
+# In-memory AWX API: paginated collections, detail views, the related
+# sub-resources the tools follow, creation and association POSTs, and
+# optionally the bulk host creation API of newer AWX versions.
+class FakeAWX:
+
+    def __init__(self, latency: float = 0, bulk: bool = False):
+        self.latency = latency
+        self.bulk = bulk
+        self.collections = {name: Collection(name) for name in collection_types}
+        self.group_hosts = {}
+        self.group_children = {}
+        self.host_groups = {}
+        self.surveys = {}
+        self.jt_credentials = {}
+        self.workflow_nodes = {}
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, method: str):
+        with self.lock:
+            self.counts[method] = self.counts.get(method, 0) + 1
+
+    def summary(self, obj: dict) -> dict:
+        summary = {}
+        if obj.get('inventory') is not None:
+            inventory = self.collections['inventories'].objects.get(obj['inventory'])
+            if inventory is not None:
+                summary['inventory'] = {'id': inventory['id'], 'name': inventory['name']}
+        if obj.get('project') is not None:
+            project = self.collections['projects'].objects[obj['project']]
+            summary['project'] = {'id': project['id'], 'name': project['name']}
+        return summary
+
+    def add(self, collection: str, obj: dict) -> dict:
+        obj = self.collections[collection].add(obj)
+        obj['summary_fields'] = {**self.summary(obj), **obj.get('summary_fields', {})}
+        return obj
+
+    def page(self, path: str, objects: list, params: list) -> tuple:
+        query = dict(params)
+        page_size = min(int(query.get('page_size', default_page_size)), max_page_size)
+        page = int(query.get('page', 1))
+        start = (page - 1) * page_size
+        if page < 1 or (start >= len(objects) and page > 1):
+            return 404, {'detail': 'Invalid page.'}
+        others = [(key, value) for key, value in params if key not in ['page', 'page_size']]
+
+        def link(number: int) -> str:
+            return f"{path}?{urlencode(others + [('page', number), ('page_size', page_size)])}"
+
+        return 200, {
+            'count': len(objects),
+            'next': link(page + 1) if start + page_size < len(objects) else None,
+            'previous': link(page - 1) if page > 1 else None,
+            'results': objects[start:start + page_size],
+        }
+
+    def filtered(self, collection: Collection, params: list) -> list:
+        filters = [(key, value) for key, value in params if key not in ['page', 'page_size', 'order_by']]
+        return [
+            obj for obj in collection.candidates(filters)
+            if all(matches(obj, key, value) for key, value in filters)
+        ]
+
+    def get(self, path: str, params: list) -> tuple:
+        if path == '/api/v2/bulk/' and self.bulk:
+            return 200, {'host_create': '/api/v2/bulk/host_create/', 'job_launch': '/api/v2/bulk/job_launch/'}
+        match = re.match(r'^/api/v2/(\w+)/(?:(\d+)/(?:(\w+)/)?)?$', path)
+        if match is None or match.group(1) not in self.collections:
+            return 404, {'detail': 'Not found.'}
+        name, id, sub = match.group(1), match.group(2), match.group(3)
+        collection = self.collections[name]
+        if id is None:
+            return self.page(path, self.filtered(collection, params), params)
+        id = int(id)
+        if id not in collection.objects:
+            return 404, {'detail': 'Not found.'}
+        if sub is None:
+            return 200, collection.objects[id]
+
+        hosts = self.collections['hosts'].objects
+        groups = self.collections['groups'].objects
+        nodes = self.collections['workflow_job_template_nodes'].objects
+        if name == 'groups' and sub == 'hosts':
+            related = [hosts[host_id] for host_id in self.group_hosts.get(id, [])]
+        elif name == 'groups' and sub == 'all_hosts':
+            related = [hosts[host_id] for host_id in sorted(self.all_hosts(id))]
+        elif name == 'groups' and sub == 'children':
+            related = [groups[group_id] for group_id in self.group_children.get(id, [])]
+        elif name == 'hosts' and sub in ['groups', 'all_groups']:
+            related = [groups[group_id] for group_id in self.host_groups.get(id, [])]
+        elif name == 'inventories' and sub == 'script':
+            return 200, self.script(id)
+        elif name in ['job_templates', 'workflow_job_templates'] and sub == 'survey_spec':
+            return 200, self.surveys.get((name, id), {})
+        elif name == 'job_templates' and sub == 'credentials':
+            related = [self.collections['credentials'].objects[cred_id] for cred_id in self.jt_credentials.get(id, [])]
+        elif name == 'workflow_job_templates' and sub == 'workflow_nodes':
+            related = [nodes[node_id] for node_id in self.workflow_nodes.get(id, [])]
+        elif name == 'workflow_job_template_nodes' and sub in ['success_nodes', 'failure_nodes', 'always_nodes']:
+            related = [nodes[node_id] for node_id in nodes[id][sub]]
+        elif name == 'inventories' and sub in ['hosts', 'groups']:
+            related = self.collections[sub].by_inventory.get(id, [])
+        else:
+            return 404, {'detail': 'Not found.'}
+        return self.page(path, related, params)
+
+    def all_hosts(self, group_id: int, seen: set = None) -> set:
+        seen = seen or {group_id}
+        hosts = set(self.group_hosts.get(group_id, []))
+        for child in self.group_children.get(group_id, []):
+            if child not in seen:
+                seen.add(child)
+                hosts |= self.all_hosts(child, seen)
+        return hosts
+
+    def script(self, inventory_id: int) -> dict:
+        hosts = self.collections['hosts'].objects
+        groups = self.collections['groups'].objects
+        script = {'all': {'children': []}, '_meta': {'hostvars': {}}}
+        for group in self.collections['groups'].by_inventory.get(inventory_id, []):
+            script['all']['children'].append(group['name'])
+            script[group['name']] = {
+                'hosts': [hosts[host_id]['name'] for host_id in self.group_hosts.get(group['id'], [])],
+                'children': [groups[child]['name'] for child in self.group_children.get(group['id'], [])],
+                'vars': {},
+            }
+        return script
+
+    def post(self, path: str, body: dict) -> tuple:
+        if path == '/api/v2/bulk/host_create/' and self.bulk:
+            with self.lock:
+                return self.bulk_host_create(body)
+        match = re.match(r'^/api/v2/(\w+)/(?:(\d+)/(\w+)/)?$', path)
+        if match is None or match.group(1) not in self.collections:
+            return 404, {'detail': 'Not found.'}
+        name, id, sub = match.group(1), match.group(2), match.group(3)
+        with self.lock:
+            if id is not None:
+                return self.associate(name, int(id), sub, body)
+            if not body.get('name'):
+                return 400, {'name': ['This field is required.']}
+            duplicates = [
+                obj for obj in self.collections[name].by_name.get(body['name'], [])
+                if obj.get('inventory') == body.get('inventory')
+            ]
+            if duplicates:
+                return 400, {'__all__': [f"{name} with this name already exists."]}
+            return 201, self.add(name, dict(body))
+
+    # All or nothing, like AWX: one invalid host rejects the whole request.
+    def bulk_host_create(self, body: dict) -> tuple:
+        inventory, hosts = body.get('inventory'), body.get('hosts', [])
+        if inventory not in self.collections['inventories'].objects:
+            return 400, {'inventory': [f'Invalid pk "{inventory}" - object does not exist.']}
+        if len(hosts) > bulk_host_max_create:
+            return 400, {'hosts': [f"Number of hosts exceeds system setting BULK_HOST_MAX_CREATE ({bulk_host_max_create})"]}
+        names = [host.get('name') for host in hosts]
+        existing = {host['name'] for host in self.collections['hosts'].by_inventory.get(inventory, [])}
+        if not all(names) or len(set(names)) != len(names) or existing & set(names):
+            return 400, {'__all__': ['Hosts must have unique names not already in the inventory.']}
+        created = [self.add('hosts', {**host, 'inventory': inventory}) for host in hosts]
+        return 201, {
+            'url': f"/api/v2/inventories/{inventory}/hosts/",
+            'hosts': [
+                {key: host.get(key) for key in ['name', 'enabled', 'instance_id', 'description', 'variables', 'id', 'url']}
+                for host in created
+            ],
+        }
+
+    def associate(self, name: str, id: int, sub: str, body: dict) -> tuple:
+        if name == 'hosts' and sub == 'groups':
+            self.host_groups.setdefault(id, []).append(body['id'])
+            self.group_hosts.setdefault(body['id'], []).append(id)
+        elif name == 'groups' and sub == 'hosts':
+            self.group_hosts.setdefault(id, []).append(body['id'])
+            self.host_groups.setdefault(body['id'], []).append(id)
+        elif name == 'job_templates' and sub == 'credentials':
+            self.jt_credentials.setdefault(id, []).append(body['id'])
+        else:
+            return 404, {'detail': 'Not found.'}
+        return 204, None
+
+
+def seed(fake: FakeAWX, inventories: int = 10, groups: int = 200, hosts: int = 2000, job_templates: int = 50,
+         workflows: int = 10, workflow_nodes: int = 20, credentials: int = 5, projects: int = 2) -> FakeAWX:
+
+    fake.add('organizations', {'name': 'Default', 'description': ''})
+    for i in range(1, projects + 1):
+        fake.add('projects', {'name': f"project-{i:03d}", 'description': '', 'organization': 1})
+    for i in range(1, credentials + 1):
+        fake.add('credentials', {'name': f"credential-{i:03d}", 'description': '', 'credential_type': 1, 'organization': 1})
+    for i in range(1, inventories + 1):
+        fake.add('inventories', {
+            'name': f"inventory-{i:04d}", 'description': '', 'kind': '', 'host_filter': None, 'variables': '',
+            'organization': 1, 'prevent_instance_group_fallback': False,
+        })
+        fake.add('inventory_sources', {
+            'name': f"source-{i:04d}", 'description': '', 'source': 'scm', 'source_path': 'hosts',
+            'source_vars': '', 'inventory': i, 'overwrite': False, 'overwrite_vars': False,
+            'update_on_launch': False, 'verbosity': 1, 'timeout': 0,
+        })
+
+    inventory_groups = {}
+    for i in range(1, groups + 1):
+        inventory = (i - 1) % inventories + 1
+        group = fake.add('groups', {
+            'name': f"group-{i:05d}", 'description': '', 'inventory': inventory,
+            'variables': '{"tier": "%d"}' % (i % 3),
+        })
+        siblings = inventory_groups.setdefault(inventory, [])
+        if i % 5 == 0 and siblings:
+            fake.group_children.setdefault(siblings[-1], []).append(group['id'])
+        siblings.append(group['id'])
+
+    for i in range(1, hosts + 1):
+        inventory = (i - 1) % inventories + 1
+        host = fake.add('hosts', {
+            'name': f"host-{i:06d}.example.org", 'description': '', 'enabled': True, 'inventory': inventory,
+            'variables': '{"ansible_host": "10.%d.%d.%d"}' % (i // 65536 % 256, i // 256 % 256, i % 256),
+        })
+        siblings = inventory_groups.get(inventory, [])
+        for group_id in sorted({siblings[i % len(siblings)], siblings[i * 7 % len(siblings)]} if siblings else []):
+            fake.group_hosts.setdefault(group_id, []).append(host['id'])
+            fake.host_groups.setdefault(host['id'], []).append(group_id)
+
+    credential_objects = list(fake.collections['credentials'].objects.values())
+    for i in range(1, job_templates + 1):
+        survey_enabled = i % 3 == 0
+        job_template = fake.add('job_templates', {
+            'name': f"job-template-{i:04d}", 'description': '', 'job_type': 'run', 'playbook': 'site.yml',
+            'inventory': (i - 1) % inventories + 1, 'project': (i - 1) % projects + 1, 'forks': 0, 'limit': '',
+            'verbosity': 0, 'extra_vars': '---\nversion: %d\n' % i, 'survey_enabled': survey_enabled,
+            'webhook_service': '', 'webhook_credential': None,
+            'summary_fields': {'credentials': [{'id': credential_objects[i % credentials]['id'], 'name': credential_objects[i % credentials]['name']}]},
+        })
+        fake.jt_credentials[job_template['id']] = [credential_objects[i % credentials]['id']]
+        if survey_enabled:
+            fake.surveys[('job_templates', job_template['id'])] = {
+                'name': '', 'description': '',
+                'spec': [{'question_name': 'target', 'variable': 'target', 'type': 'text', 'required': True, 'default': ''}],
+            }
+
+    template_objects = list(fake.collections['job_templates'].objects.values())
+    for i in range(1, workflows + 1):
+        workflow = fake.add('workflow_job_templates', {
+            'name': f"workflow-{i:04d}", 'description': '', 'inventory': None, 'extra_vars': '',
+            'survey_enabled': False, 'webhook_service': '', 'webhook_credential': None, 'limit': None,
+        })
+        node_ids = []
+        for n in range(workflow_nodes):
+            template = template_objects[(i + n) % len(template_objects)]
+            node_ids.append(fake.add('workflow_job_template_nodes', {
+                'name': f"workflow-{i:04d}-node-{n:03d}", 'identifier': f"node-{n:03d}", 'workflow_job_template': workflow['id'],
+                'all_parents_must_converge': False, 'inventory': None,
+                'success_nodes': [], 'failure_nodes': [], 'always_nodes': [],
+                'summary_fields': {'unified_job_template': {
+                    'id': template['id'], 'name': template['name'], 'description': '', 'unified_job_type': 'job',
+                }},
+            })['id'])
+        nodes = fake.collections['workflow_job_template_nodes'].objects
+        for n, node_id in enumerate(node_ids[:-1]):
+            nodes[node_id]['success_nodes'].append(node_ids[n + 1])
+            if n + 2 < len(node_ids):
+                nodes[node_id]['failure_nodes'].append(node_ids[n + 2])
+        fake.workflow_nodes[workflow['id']] = node_ids
+
+    return fake
+
+
+class FakeAWXHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, data):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server.fake
+        fake.count('GET')
+        time.sleep(fake.latency)
+        url = urlparse(self.path)
+        self.send_json(*fake.get(url.path, parse_qsl(url.query)))
+
+    def do_POST(self):
+        fake = self.server.fake
+        fake.count('POST')
+        time.sleep(fake.latency)
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        self.send_json(*fake.post(urlparse(self.path).path, body))
+
+
+def start_server(fake: FakeAWX, port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeAWXHandler)
+    server.daemon_threads = True
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
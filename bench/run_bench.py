@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+import yaml
+
+from fake_awx import FakeAWX, seed, start_server
+
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+scenarios = {
+    'export-inventory': ['asset2yaml.py', '-t', 'inventory'],
+    'export-hosts': ['asset2yaml.py', '-t', 'hosts'],
+    'export-groups': ['asset2yaml.py', '-t', 'groups'],
+    'export-job-templates': ['asset2yaml.py', '-t', 'job_template'],
+    'export-workflows': ['asset2yaml.py', '-t', 'workflow_job_templates'],
+    'port-inventory-groups-hosts': ['awx-porting.py', '--types', 'inventory,groups,hosts'],
+}
+
+
+def write_config(path: str, src_url: str, dst_url: str):
+    config = {
+        'src_tower': {'url': src_url, 'usr': 'admin', 'pwd': 'secret', 'verifyssl': False},
+        'dst_tower': {'url': dst_url, 'usr': 'admin', 'pwd': 'secret', 'verifyssl': False},
+    }
+    with open(path, 'w') as file:
+        yaml.safe_dump(config, file)
+
+
+def run_scenario(name: str, args, extra_args: list) -> dict:
+
+    src = seed(FakeAWX(latency=args.latency), inventories=args.inventories, groups=args.groups, hosts=args.hosts,
+               job_templates=args.job_templates, workflows=args.workflows, workflow_nodes=args.workflow_nodes)
+    # The destination starts with what awx-porting.py does not port itself.
+    dst = FakeAWX(latency=args.latency, bulk=args.bulk)
+    dst.add('organizations', {'name': 'Default', 'description': ''})
+    for project in src.collections['projects'].objects.values():
+        dst.add('projects', {'name': project['name'], 'description': '', 'organization': 1})
+    src_server = start_server(src)
+    dst_server = start_server(dst)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        config_file = os.path.join(work_dir, 'bench.yml')
+        write_config(config_file, f"http://127.0.0.1:{src_server.server_port}", f"http://127.0.0.1:{dst_server.server_port}")
+        with open(os.path.join(work_dir, 'credentials.json'), 'w') as file:
+            json.dump({
+                credential['name']: {'inputs': {'username': 'bench', 'password': 'bench'}}
+                for credential in src.collections['credentials'].objects.values()
+            }, file)
+
+        script, *script_args = scenarios[name]
+        command = [sys.executable, os.path.join(repo_dir, script), '-c', config_file, '--log-level', 'WARNING', *script_args, *extra_args]
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        stderr = process.stderr.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+
+    src_server.shutdown()
+    dst_server.shutdown()
+    errors = [line for line in stderr.decode().splitlines() if ' ERROR ' in line]
+    if status != 0:
+        print(stderr.decode(), file=sys.stderr)
+    elif errors:
+        print("\n".join(errors[:10]), file=sys.stderr)
+
+    return {
+        'scenario': name,
+        'ok': status == 0 and not errors,
+        'logged_errors': len(errors),
+        'wall_seconds': round(wall, 3),
+        'src_requests': src.counts,
+        'dst_requests': dst.counts,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mib': round(usage.ru_maxrss / 1024, 1),
+    }
+
+
+def compare(results: list, baseline_file: str, tolerance: float) -> list:
+
+    with open(baseline_file, 'r') as file:
+        baseline = {result['scenario']: result for result in json.load(file)}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['scenario'])
+        if previous is None:
+            continue
+        for metric in ['wall_seconds', 'peak_rss_mib']:
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{result['scenario']}: {metric} {previous[metric]} -> {result[metric]}")
+        for side in ['src_requests', 'dst_requests']:
+            if sum(result[side].values()) > sum(previous[side].values()):
+                regressions.append(f"{result['scenario']}: {side} {sum(previous[side].values())} -> {sum(result[side].values())}")
+    return regressions
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        prog='run_bench.py',
+        description='Runs asset2yaml.py and awx-porting.py end to end against local fake AWX servers.'
+    )
+    parser.add_argument('-S', '--scenarios', type=str, action='store', default=','.join(scenarios), help='Comma separated scenarios to run')
+    parser.add_argument('--inventories', type=int, action='store', default=10, help='Number of source inventories')
+    parser.add_argument('--groups', type=int, action='store', default=200, help='Number of source groups')
+    parser.add_argument('--hosts', type=int, action='store', default=2000, help='Number of source hosts')
+    parser.add_argument('--job-templates', type=int, action='store', default=50, help='Number of source job templates')
+    parser.add_argument('--workflows', type=int, action='store', default=10, help='Number of source workflows')
+    parser.add_argument('--workflow-nodes', type=int, action='store', default=20, help='Number of nodes per workflow')
+    parser.add_argument('--latency', type=float, action='store', default=0, help='Seconds added to every fake AWX response')
+    parser.add_argument('--bulk', action='store_true', help='Give the destination fake the bulk host creation API')
+    parser.add_argument('--export-args', type=str, action='store', default='', help='Extra arguments for asset2yaml.py')
+    parser.add_argument('--port-args', type=str, action='store', default='', help='Extra arguments for awx-porting.py')
+    parser.add_argument('-o', '--output', type=str, action='store', help='Write the results as JSON')
+    parser.add_argument('-b', '--baseline', type=str, action='store', help='Compare against a previous JSON result and fail on regressions')
+    parser.add_argument('--tolerance', type=float, action='store', default=0.2, help='Allowed relative wall time and RSS increase over the baseline')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'scenario':<30} {'ok':<4} {'wall s':>8} {'src GET':>8} {'dst GET':>8} {'dst POST':>8} {'RSS MiB':>8}")
+    for name in args.scenarios.split(','):
+        extra_args = shlex.split(args.port_args if scenarios[name][0] == 'awx-porting.py' else args.export_args)
+        result = run_scenario(name, args, extra_args)
+        results.append(result)
+        print(
+            f"{name:<30} {'yes' if result['ok'] else 'NO':<4} {result['wall_seconds']:>8.2f} "
+            f"{result['src_requests'].get('GET', 0):>8} {result['dst_requests'].get('GET', 0):>8} "
+            f"{result['dst_requests'].get('POST', 0):>8} {result['peak_rss_mib']:>8.1f}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    failed = [result['scenario'] for result in results if not result['ok']]
+    regressions = compare(results, args.baseline, args.tolerance) if args.baseline else []
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()